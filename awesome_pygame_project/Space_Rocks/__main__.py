@@ -1,5 +1,30 @@
+import argparse
+import random
+
+from controls import KeyboardInput
 from game import SpaceRocks
+from replay import InputRecorder, replay
 
 if __name__ == "__main__" :
-    space_rocks = SpaceRocks()
-    space_rocks.main_loop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(prog="Space_Rocks")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--record", metavar="PATH")
+    parser.add_argument("--replay", metavar="PATH")
+    args = parser.parse_args()
+    if args.replay :
+        print(replay(args.replay)[1])
+    elif args.headless :
+        space_rocks = SpaceRocks(headless=True, seed=args.seed)
+        print(space_rocks.run(max_ticks=10000))
+    elif args.record :
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+        recorder = InputRecorder(KeyboardInput(), seed)
+        space_rocks = SpaceRocks(seed=seed, input_source=recorder)
+        try :
+            space_rocks.main_loop()
+        finally :
+            recorder.save(args.record)
+    else :
+        space_rocks = SpaceRocks(seed=args.seed)
+        space_rocks.main_loop()
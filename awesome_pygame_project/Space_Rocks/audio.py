@@ -0,0 +1,126 @@
+import time
+
+import pygame
+
+
+def play_now(sound, priority=0) :
+    # Unqueued fallback for objects not attached to a SoundService
+    sound.play()
+
+
+class NullBackend :
+    # Headless games and machines without an audio device: every channel
+    # is always free and playing does nothing.
+    channel_count = 0
+
+    def is_busy(self, index) :
+        return False
+
+    def play(self, index, sound) :
+        pass
+
+    def stop(self, index) :
+        pass
+
+
+class MixerBackend :
+    # Reserves `channel_count` pygame.mixer channels for the sound service
+    # so pygame's own find_channel() never picks them.
+    def __init__(self, channel_count=8) :
+        if pygame.mixer.get_num_channels() < channel_count :
+            pygame.mixer.set_num_channels(channel_count)
+        pygame.mixer.set_reserved(channel_count)
+        self.channel_count = channel_count
+        self.channels = [pygame.mixer.Channel(i) for i in range(channel_count)]
+
+    def is_busy(self, index) :
+        return self.channels[index].get_busy()
+
+    def play(self, index, sound) :
+        self.channels[index].play(sound)
+
+    def stop(self, index) :
+        self.channels[index].stop()
+
+
+class SoundService :
+    # Game code calls play(), which only records the request. Once per
+    # rendered frame flush() hands the queued sounds to the backend:
+    # identical sounds requested in the same frame collapse into one play,
+    # a sound never starts again within MIN_INTERVAL, and when every
+    # channel is busy the oldest lowest-priority voice is stolen, provided
+    # it isn't more important than the new sound.
+    MIN_INTERVAL = 0.05
+
+    def __init__(self, backend=None, clock=time.perf_counter) :
+        self.backend = backend or NullBackend()
+        self.clock = clock
+        self.pending = {}
+        # Per channel: (priority, start time) of the voice last started on it
+        self.voices = [None] * self.backend.channel_count
+        self.last_played = {}
+        self.requested = 0
+        self.played = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def play(self, sound, priority=0) :
+        self.requested += 1
+        queued = self.pending.get(sound)
+        if queued is None :
+            self.pending[sound] = priority
+        else :
+            self.coalesced += 1
+            if priority > queued :
+                self.pending[sound] = priority
+
+    def flush(self) :
+        if not self.pending :
+            return
+        now = self.clock()
+        # Most important first, so they get the free channels
+        requests = sorted(self.pending.items(), key=lambda item: -item[1])
+        self.pending.clear()
+        for sound, priority in requests :
+            last = self.last_played.get(sound)
+            if last is not None and now - last < self.MIN_INTERVAL :
+                self.throttled += 1
+                continue
+            index = self._find_channel(priority)
+            if index is None :
+                if self.backend.channel_count :
+                    self.dropped += 1
+                else :
+                    # Null backend: the sound "plays" without a channel
+                    self.last_played[sound] = now
+                    self.played += 1
+                continue
+            self.backend.play(index, sound)
+            self.voices[index] = (priority, now)
+            self.last_played[sound] = now
+            self.played += 1
+
+    def _find_channel(self, priority) :
+        victim = None
+        for index, voice in enumerate(self.voices) :
+            if voice is None or not self.backend.is_busy(index) :
+                return index
+            if voice[0] <= priority and (victim is None or voice < self.voices[victim]) :
+                victim = index
+        if victim is not None :
+            self.backend.stop(victim)
+            self.stolen += 1
+        return victim
+
+    def stats(self) :
+        return {
+            "channels": self.backend.channel_count,
+            "requested": self.requested,
+            "played": self.played,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+import pygame
+
+from controls import CallbackInput
+from game import SpaceRocks
+from models import Shield, Spaceship
+
+MAX_TICKS = 60 * 60
+# Class attributes a parameter grid may override, by "Class.ATTRIBUTE"
+TUNABLE = {
+    "SpaceRocks": SpaceRocks,
+    "Spaceship": Spaceship,
+    "Shield": Shield,
+}
+
+
+def idle_bot(game) :
+    return lambda: ((), ())
+
+
+def aiming_bot(game) :
+    # Turns toward the nearest asteroid and fires when roughly lined up
+    ticks = itertools.count()
+
+    def play() :
+        tick = next(ticks)
+        ship = game.spaceship
+        if ship is None or not game.asteroids :
+            return (), ()
+        target = min(
+            game.asteroids,
+            key=lambda asteroid: ship.position.distance_squared_to(asteroid.position),
+        )
+        angle = ship.direction.angle_to(target.position - ship.position)
+        angle = (angle + 180) % 360 - 180
+        held = []
+        if angle > ship.MANEUVERABILITY / 2 :
+            held.append(pygame.K_RIGHT)
+        elif angle < -ship.MANEUVERABILITY / 2 :
+            held.append(pygame.K_LEFT)
+        events = []
+        if abs(angle) < 10 and tick % 6 == 0 :
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        return events, held
+
+    return play
+
+
+BOTS = {
+    "idle": idle_bot,
+    "aim": aiming_bot,
+}
+
+
+@contextmanager
+def overrides(params) :
+    # Worker processes play one game at a time, so patching class
+    # attributes for the length of a game is safe
+    saved = []
+    try :
+        for name, value in params.items() :
+            class_name, attribute = name.split(".")
+            cls = TUNABLE[class_name]
+            saved.append((cls, attribute, getattr(cls, attribute)))
+            setattr(cls, attribute, value)
+        yield
+    finally :
+        for cls, attribute, value in reversed(saved) :
+            setattr(cls, attribute, value)
+
+
+def play_game(task) :
+    params, seed, bot, max_ticks = task
+    with overrides(params) :
+        game = SpaceRocks(headless=True, seed=seed)
+        game.input_source = CallbackInput(BOTS[bot](game))
+        stats = game.run(max_ticks=max_ticks)
+    if stats["won"] :
+        outcome = "win"
+    elif stats["lost"] :
+        outcome = "loss"
+    else :
+        outcome = "timeout"
+    return {
+        "params": params,
+        "seed": seed,
+        "bot": bot,
+        "score": stats["score"],
+        "ticks": stats["ticks"],
+        "outcome": outcome,
+    }
+
+
+def tasks(grid, seeds, bot, max_ticks) :
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)) :
+        params = dict(zip(names, values))
+        for seed in seeds :
+            yield params, seed, bot, max_ticks
+
+
+def _init_worker() :
+    # Games print shield hits; keep worker output quiet
+    sys.stdout = open(os.devnull, "w")
+
+
+class JsonlSink :
+    def __init__(self, path) :
+        self.file = open(path, "w")
+
+    def write(self, result) :
+        self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self) :
+        self.file.close()
+
+
+class CsvSink :
+    def __init__(self, path, param_names) :
+        self.file = open(path, "w", newline="")
+        self.param_names = param_names
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([*param_names, "seed", "bot", "score", "ticks", "outcome"])
+
+    def write(self, result) :
+        self.writer.writerow([
+            *[result["params"][name] for name in self.param_names],
+            result["seed"],
+            result["bot"],
+            result["score"],
+            result["ticks"],
+            result["outcome"],
+        ])
+        self.file.flush()
+
+    def close(self) :
+        self.file.close()
+
+
+def run_batch(grid, seeds, sink, bot="aim", max_ticks=MAX_TICKS, workers=None) :
+    # Results are handed to the sink as games finish; nothing is kept in
+    # memory, and workers are recycled to cap their footprint
+    finished = 0
+    with Pool(workers, initializer=_init_worker, maxtasksperchild=500) as pool :
+        for result in pool.imap_unordered(
+            play_game, tasks(grid, seeds, bot, max_ticks), chunksize=4
+        ) :
+            sink.write(result)
+            finished += 1
+    return finished
+
+
+def parse_grid(entries) :
+    grid = {}
+    for entry in entries :
+        name, values = entry.split("=")
+        if name.split(".")[0] not in TUNABLE :
+            raise ValueError(f"Unknown parameter {name}")
+        grid[name] = [json.loads(value) for value in values.split(",")]
+    return grid
+
+
+def main(argv=None) :
+    parser = argparse.ArgumentParser(description="Play many headless Space Rocks games")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="e.g. Spaceship.MAX_SPEED=4,5,6 (repeatable)",
+    )
+    parser.add_argument("--seeds", type=int, default=10, help="seeds per grid point")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="aim")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="results.jsonl", help=".jsonl or .csv")
+    args = parser.parse_args(argv)
+
+    grid = parse_grid(args.grid)
+    if args.out.endswith(".csv") :
+        sink = CsvSink(args.out, sorted(grid))
+    else :
+        sink = JsonlSink(args.out)
+    try :
+        finished = run_batch(
+            grid, range(args.seeds), sink, args.bot, args.max_ticks, args.workers
+        )
+    finally :
+        sink.close()
+    print(f"{finished} games written to {args.out}")
+
+
+if __name__ == "__main__" :
+    main()
@@ -0,0 +1,247 @@
+import os
+
+# Must be set before pygame initialises the display and mixer
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from controls import CallbackInput, key_event
+from game import SpaceRocks
+
+TICKS = 600
+TOLERANCE = 0.15
+# Phases compared against the baseline besides the whole frame
+COMPARED_PHASES = (
+    "logic.move",
+    "logic.bullet_collision",
+    "logic.ship_collision",
+    "draw",
+)
+
+
+def idle_bot(game) :
+    return lambda: ((), ())
+
+
+def shooting_bot(game) :
+    # Fires every tick while turning, keeping the bullet list full
+    def play() :
+        return [key_event(pygame.K_SPACE)], [pygame.K_RIGHT]
+    return play
+
+
+def cascade(game, large_asteroids) :
+    # Spawns large asteroids and splits them down to the smallest size,
+    # leaving four fragments per large asteroid
+    game._release(*game.asteroids)
+    game.asteroids.clear()
+    for _ in range(large_asteroids) :
+        position = (game.rng.randrange(800), game.rng.randrange(600))
+        game.asteroids.append(
+            game.asteroid_pool.acquire(
+                position, game.asteroids.append, 3, None, game.rng
+            )
+        )
+    while any(asteroid.size > 1 for asteroid in game.asteroids) :
+        for asteroid in list(game.asteroids) :
+            if asteroid.size > 1 :
+                game.asteroids.remove(asteroid)
+                asteroid.split()
+                game._release(asteroid)
+
+
+SCENARIOS = {
+    "six_large": (idle_bot, None),
+    "fragment_field": (idle_bot, lambda game: cascade(game, 125)),
+    "shoot_spam": (shooting_bot, None),
+}
+
+
+def play(name, seed, ticks, entity_store, on_frame) :
+    bot, setup = SCENARIOS[name]
+    game = SpaceRocks(entity_store=entity_store, profile=True, seed=seed)
+    game.input_source = CallbackInput(bot(game))
+    if setup :
+        setup(game)
+    for _ in range(ticks) :
+        start = time.perf_counter()
+        game.profiler.begin_frame()
+        game.step()
+        with game.profiler.phase("draw") :
+            game._draw()
+        game._end_profiled_frame()
+        on_frame(time.perf_counter() - start, len(game.asteroids) + len(game.bullets))
+    return game
+
+
+def percentile(values, fraction) :
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scenario(name, seed=1, ticks=TICKS, entity_store=False) :
+    frame_times = []
+    entities = []
+
+    def record(seconds, entity_count) :
+        frame_times.append(seconds)
+        entities.append(entity_count)
+
+    with contextlib.redirect_stdout(io.StringIO()) :
+        game = play(name, seed, ticks, entity_store, record)
+        # Same seeded run again under tracemalloc, which would skew timings
+        tracemalloc.start()
+        play(name, seed, ticks, entity_store, lambda *args: None)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    phase_times = {phase: [] for phase in COMPARED_PHASES}
+    for frame in game.profiler.frames :
+        for phase in COMPARED_PHASES :
+            phase_times[phase].append(frame["phases"].get(phase, 0.0))
+    return {
+        "ticks": ticks,
+        "frame_ms": {
+            "p50": 1000 * percentile(frame_times, 0.50),
+            "p90": 1000 * percentile(frame_times, 0.90),
+            "p99": 1000 * percentile(frame_times, 0.99),
+        },
+        "phase_p50_ms": {
+            phase: 1000 * percentile(times, 0.50)
+            for phase, times in phase_times.items()
+        },
+        "entities_per_second": sum(entities) / sum(frame_times),
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE) :
+    regressions = []
+    for name, result in results.items() :
+        expected = baseline.get(name)
+        if expected is None :
+            continue
+        checks = [("frame p50", result["frame_ms"]["p50"], expected["frame_ms"]["p50"])]
+        checks += [
+            (phase, result["phase_p50_ms"][phase], expected["phase_p50_ms"][phase])
+            for phase in COMPARED_PHASES
+            if phase in expected["phase_p50_ms"]
+        ]
+        for label, measured, reference in checks :
+            if reference and measured > reference * (1 + tolerance) :
+                regressions.append(
+                    f"{name}: {label} {measured:.3f} ms vs baseline {reference:.3f} ms"
+                )
+    return regressions
+
+
+def transient_bytes(objects, call) :
+    # Average peak of traced memory above the starting level during one
+    # call: the temporaries (Vector2s, tuples, floats) a call allocates,
+    # which are freed before it returns and so never show up as net growth
+    tracemalloc.start()
+    total = 0
+    for obj in objects :
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        call(obj)
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / len(objects)
+
+
+def run_core(seed=1, large_asteroids=125, repeat=50) :
+    # Times the per-object hot paths on their own: one move() per asteroid
+    # and collides_with() for every asteroid pair in the fragment field.
+    # Allocation is measured in a separate traced pass, as tracemalloc
+    # would skew the timings.
+    with contextlib.redirect_stdout(io.StringIO()) :
+        game = SpaceRocks(headless=True, seed=seed)
+        cascade(game, large_asteroids)
+    asteroids = game.asteroids
+    start = time.perf_counter()
+    for _ in range(repeat) :
+        for asteroid in asteroids :
+            asteroid.move(game.screen)
+    move_seconds = time.perf_counter() - start
+    pairs = 0
+    start = time.perf_counter()
+    for _ in range(max(1, repeat // 10)) :
+        for asteroid in asteroids :
+            for other in asteroids :
+                asteroid.collides_with(other)
+            pairs += len(asteroids)
+    collide_seconds = time.perf_counter() - start
+    other = asteroids[0]
+    return {
+        "objects": len(asteroids),
+        "move_us": 1e6 * move_seconds / (repeat * len(asteroids)),
+        "collides_with_us": 1e6 * collide_seconds / pairs,
+        "move_bytes": transient_bytes(asteroids, lambda a: a.move(game.screen)),
+        "collides_with_bytes": transient_bytes(
+            asteroids, lambda a: a.collides_with(other)
+        ),
+        "blit_source_bytes": transient_bytes(asteroids, lambda a: a.blit_source()),
+    }
+
+
+def main(argv=None) :
+    parser = argparse.ArgumentParser(description="Space Rocks benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--ticks", type=int, default=TICKS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--entity-store", action="store_true")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="fail if slower than this baseline file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument(
+        "--core", action="store_true", help="time move() and collides_with() alone"
+    )
+    args = parser.parse_args(argv)
+
+    if args.core :
+        core = run_core(args.seed)
+        print(
+            f"core {core['objects']} objects  "
+            f"move {core['move_us']:.3f} us {core['move_bytes']:.0f} B  "
+            f"collides_with {core['collides_with_us']:.3f} us "
+            f"{core['collides_with_bytes']:.0f} B  "
+            f"blit_source {core['blit_source_bytes']:.0f} B"
+        )
+        # Temporaries allocated per frame by moving and drawing the field
+        frame_bytes = core["objects"] * (core["move_bytes"] + core["blit_source_bytes"])
+        print(f"core transient allocation per frame {frame_bytes / 1024:.1f} KiB")
+        return 0
+
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS) :
+        results[name] = run_scenario(name, args.seed, args.ticks, args.entity_store)
+        frame_ms = results[name]["frame_ms"]
+        print(
+            f"{name:15} p50 {frame_ms['p50']:.3f} ms  p90 {frame_ms['p90']:.3f} ms  "
+            f"p99 {frame_ms['p99']:.3f} ms  "
+            f"{results[name]['entities_per_second']:.0f} entities/s  "
+            f"peak {results[name]['peak_memory_kib']:.0f} KiB"
+        )
+    if args.save :
+        with open(args.save, "w") as baseline_file :
+            json.dump(results, baseline_file, indent=2)
+    if args.compare :
+        with open(args.compare) as baseline_file :
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions :
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import pygame
+from itertools import repeat
+
+
+class HeldKeys :
+    # Stands in for pygame.key.get_pressed() when input isn't coming from
+    # the keyboard: indexing with a key constant says whether it's held.
+    def __init__(self, keys=()) :
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key) :
+        return key in self.keys
+
+
+def key_event(key, down=True) :
+    event_type = pygame.KEYDOWN if down else pygame.KEYUP
+    return pygame.event.Event(event_type, key=key)
+
+
+class KeyboardInput :
+    def get_events(self) :
+        return pygame.event.get()
+
+    def get_pressed(self) :
+        return pygame.key.get_pressed()
+
+
+class CallbackInput :
+    # Programmatic input: `callback()` is asked once per tick for an
+    # (events, held keys) pair, or None to end the game.
+    def __init__(self, callback) :
+        self.callback = callback
+        self.held = HeldKeys()
+
+    def get_events(self) :
+        tick = self.callback()
+        if tick is None :
+            self.held = HeldKeys()
+            return [pygame.event.Event(pygame.QUIT)]
+        events, held = tick
+        self.held = HeldKeys(held)
+        return list(events)
+
+    def get_pressed(self) :
+        return self.held
+
+
+class ScriptedInput(CallbackInput) :
+    # Plays back an iterable of (events, held keys) pairs, one per tick,
+    # and quits once the script runs out.
+    def __init__(self, script) :
+        ticks = iter(script)
+        super().__init__(lambda: next(ticks, None))
+
+
+def idle_input() :
+    return ScriptedInput(repeat(((), ())))
@@ -0,0 +1,165 @@
+from pygame.math import Vector2
+
+try :
+    import numpy as np
+except ImportError :
+    np = None
+
+
+class EntityStore :
+    # Structure-of-arrays storage for large waves: positions, velocities and
+    # radii live in contiguous NumPy arrays so movement, wrapping, culling
+    # and overlap tests run as batch operations. Game objects created from
+    # proxy_class() read and write their rows through StoredVector/
+    # StoredScalar, so the rest of the code keeps using the GameObject API.
+    def __init__(self, capacity=256) :
+        if np is None :
+            raise ImportError("EntityStore requires numpy to be installed")
+        self.positions = np.zeros((capacity, 2))
+        self.velocities = np.zeros((capacity, 2))
+        self.radii = np.zeros(capacity)
+        self.wraps = np.zeros(capacity, dtype=bool)
+        self.owners = [None] * capacity
+        self.count = 0
+        self.proxy_classes = {}
+
+    def proxy_class(self, base, wraps=True) :
+        proxy = self.proxy_classes.get(base)
+        if proxy is None :
+            proxy = type(
+                f"Stored{base.__name__}",
+                (EntityProxy, base),
+                {"store": self, "wraps": wraps},
+            )
+            self.proxy_classes[base] = proxy
+        return proxy
+
+    def _grow(self) :
+        capacity = len(self.owners) * 2
+        for name in ("positions", "velocities", "radii", "wraps") :
+            array = getattr(self, name)
+            grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+        self.owners.extend([None] * (capacity - len(self.owners)))
+
+    def acquire(self, owner, wraps=True) :
+        if self.count == len(self.owners) :
+            self._grow()
+        slot = self.count
+        self.count += 1
+        self.owners[slot] = owner
+        self.wraps[slot] = wraps
+        owner._slot = slot
+        return slot
+
+    def release(self, owner) :
+        slot = owner._slot
+        if slot is None :
+            return
+        # Keep a detached copy so a released object can still be read
+        owner._released = {
+            "positions": Vector2(*self.positions[slot]),
+            "velocities": Vector2(*self.velocities[slot]),
+            "radii": float(self.radii[slot]),
+        }
+        owner._slot = None
+        last = self.count - 1
+        if slot != last :
+            for array in (self.positions, self.velocities, self.radii, self.wraps) :
+                array[slot] = array[last]
+            moved = self.owners[last]
+            moved._slot = slot
+            self.owners[slot] = moved
+        self.owners[last] = None
+        self.count = last
+
+    def slots(self, owners) :
+        return np.fromiter(
+            (owner._slot for owner in owners), dtype=np.intp, count=len(owners)
+        )
+
+    def move(self, size, dt_scale) :
+        positions = self.positions[:self.count]
+        positions += self.velocities[:self.count] * dt_scale
+        wraps = self.wraps[:self.count]
+        positions[wraps] = np.mod(positions[wraps], size)
+
+    def outside(self, owners, size) :
+        # Rect.collidepoint truncates float coordinates, so anything in
+        # (-1, width) still counts as on screen
+        positions = self.positions[self.slots(owners)]
+        width, height = size
+        return (
+            (positions[:, 0] <= -1)
+            | (positions[:, 0] >= width)
+            | (positions[:, 1] <= -1)
+            | (positions[:, 1] >= height)
+        )
+
+    def overlapping(self, position, radius, owners) :
+        slots = self.slots(owners)
+        delta = self.positions[slots] - (position[0], position[1])
+        radii = self.radii[slots] + radius
+        return delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1] < radii * radii
+
+    def overlaps(self, owners_a, owners_b) :
+        # Boolean matrix, row per owners_a entry, column per owners_b entry
+        slots_a = self.slots(owners_a)
+        slots_b = self.slots(owners_b)
+        delta = self.positions[slots_a][:, None, :] - self.positions[slots_b][None, :, :]
+        radii = self.radii[slots_a][:, None] + self.radii[slots_b][None, :]
+        return delta[..., 0] * delta[..., 0] + delta[..., 1] * delta[..., 1] < radii * radii
+
+
+class StoredVector :
+    def __init__(self, name) :
+        self.name = name
+
+    def __get__(self, obj, owner=None) :
+        if obj is None :
+            return self
+        if obj._slot is None :
+            return obj._released[self.name]
+        return Vector2(*getattr(obj.store, self.name)[obj._slot])
+
+    def __set__(self, obj, value) :
+        if obj._slot is None :
+            obj._released[self.name] = Vector2(value)
+        else :
+            getattr(obj.store, self.name)[obj._slot] = (value[0], value[1])
+
+
+class StoredScalar :
+    def __init__(self, name) :
+        self.name = name
+
+    def __get__(self, obj, owner=None) :
+        if obj is None :
+            return self
+        if obj._slot is None :
+            return obj._released[self.name]
+        return float(getattr(obj.store, self.name)[obj._slot])
+
+    def __set__(self, obj, value) :
+        if obj._slot is None :
+            obj._released[self.name] = value
+        else :
+            getattr(obj.store, self.name)[obj._slot] = value
+
+
+class EntityProxy :
+    store = None
+    wraps = True
+    position = StoredVector("positions")
+    velocity = StoredVector("velocities")
+    radius = StoredScalar("radii")
+
+    def __init__(self, *args, **kwargs) :
+        self.store.acquire(self, self.wraps)
+        super().__init__(*args, **kwargs)
+
+    def reset(self, *args, **kwargs) :
+        if self._slot is None :
+            self.store.acquire(self, self.wraps)
+        super().reset(*args, **kwargs)
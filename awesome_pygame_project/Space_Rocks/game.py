@@ -1,20 +1,76 @@
 import pygame
+import random
 import time
 
-from models import Asteroid, Spaceship, Shield
-from utils import get_random_position, load_sprite, print_text
+from audio import MixerBackend, NullBackend, SoundService
+from controls import KeyboardInput, idle_input
+from entities import EntityStore, np
+from profiler import FrameProfiler
+from models import TICK_RATE, TIME_STEP, Asteroid, Bullet, Spaceship, Shield
+from utils import (
+    ObjectPool,
+    SpatialHash,
+    SpriteAtlas,
+    assets,
+    get_random_position,
+    print_text,
+)
 
 class SpaceRocks :
     MIN_ASTEROID_DISTANCE = 250
     ASTEROID_VALUE = 100
     BONUS = 10
     BONUS_VALUE = 1000
+    SCREEN_SIZE = (800, 600)
+    POOL_SIZE = 256
+    RENDER_RATE = 60
+    # Most logic steps run between two rendered frames before the loop
+    # gives up on catching up and drops the backlog.
+    MAX_CATCH_UP_STEPS = 5
+    SOUND_CHANNELS = 8
     
-    def __init__(self) :
+    def __init__(
+        self,
+        headless=False,
+        input_source=None,
+        entity_store=False,
+        pool_size=None,
+        dirty_rects=False,
+        profile=False,
+        seed=None,
+    ) :
+        # Headless games never open a window or the mixer and are stepped
+        # with run() instead of main_loop().
+        self.headless = headless
+        # Every random draw in a game comes from this generator, so a seed
+        # plus the recorded input reproduces a run exactly
+        if seed is None :
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # With entity_store, asteroids and bullets keep their state in a
+        # NumPy EntityStore and the hot loops run as batch operations.
+        self.entity_store = EntityStore() if entity_store else None
+        if input_source is None :
+            input_source = idle_input() if headless else KeyboardInput()
+        self.input_source = input_source
+        self.running = True
+        self.pause_started = None
+        self.paused_frame = None
+        # Opt-in renderer that only redraws and updates changed regions
+        self.dirty_rects = dirty_rects
+        self.full_redraw = True
+        self.previous_rects = []
+        # Per-phase timings; F3 toggles the on-screen overlay
+        self.profiler = FrameProfiler(enabled=profile)
         self._init_pygame()
         self.game_status = 1
-        self.screen = pygame.display.set_mode((800,600))
-        self.background = load_sprite("space", False)
+        if headless :
+            self.screen = pygame.Surface(self.SCREEN_SIZE)
+        else :
+            self.screen = pygame.display.set_mode(self.SCREEN_SIZE)
+        self._preload_assets()
+        self.background = assets.sprite("space", False)
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 64)
         self.message_1 = ""
@@ -22,29 +78,146 @@ class SpaceRocks :
         self.asteroids = []
         self.bullets = []
         self.spaceship = Spaceship((400, 300), self.bullets.append)
+        if self.entity_store :
+            asteroid_class = self.entity_store.proxy_class(Asteroid)
+            bullet_class = self.entity_store.proxy_class(Bullet, wraps=False)
+        else :
+            asteroid_class = Asteroid
+            bullet_class = Bullet
+        # Destroyed asteroids and spent bullets go back to these pools and
+        # are reset in place for the next spawn
+        # Read at call time so a tuned POOL_SIZE takes effect
+        if pool_size is None :
+            pool_size = self.POOL_SIZE
+        self.asteroid_pool = ObjectPool(asteroid_class, pool_size)
+        self.bullet_pool = ObjectPool(bullet_class, pool_size)
+        self.spaceship.bullet_factory = self.bullet_pool.acquire
+        # Sounds requested during logic are played once per rendered frame
+        self.sounds = SoundService(self._sound_backend())
+        self.spaceship.play_sound = self.sounds.play
         self.shields = Shield(self.spaceship)
+        self.atlas = None if headless else self._build_atlas()
         self.player_score = 0
         self.bonus_count = 0
         for _ in range(6) :
             while True :
-                position = get_random_position(self.screen)
+                position = get_random_position(self.screen, self.rng)
                 if (
                     position.distance_to(self.spaceship.position)
                     > self.MIN_ASTEROID_DISTANCE
                 ) :
                     break
-            self.asteroids.append(Asteroid(position, self.asteroids.append))
+            self.asteroids.append(
+                self.asteroid_pool.acquire(
+                    position, self.asteroids.append, 3, None, self.rng
+                )
+            )
         
     def main_loop(self) :
-        while True :
+        # Logic advances in fixed TIME_STEP increments; rendering happens
+        # once per pass, so a slow frame costs frames, not game speed.
+        accumulator = 0.0
+        previous = time.perf_counter()
+        while self.running :
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+            steps = 0
+            self.profiler.begin_frame()
+            while (
+                self.running
+                and accumulator >= TIME_STEP
+                and steps < self.MAX_CATCH_UP_STEPS
+            ) :
+                self.step()
+                accumulator -= TIME_STEP
+                steps += 1
+            if steps == self.MAX_CATCH_UP_STEPS :
+                accumulator = min(accumulator, TIME_STEP)
+            if steps :
+                self.sounds.flush()
+                with self.profiler.phase("draw") :
+                    self._draw()
+                self._end_profiled_frame()
+            else :
+                self.profiler.current = None
+            self.clock.tick(self.RENDER_RATE)
+        quit()
+
+    def step(self) :
+        with self.profiler.phase("input") :
             self._handle_input()
-            self._process_game_logic()
-            self._draw()
+        if not self.running :
+            return
+        if self.game_status == -1 :
+            self._update_pause()
+        else :
+            with self.profiler.phase("logic") :
+                self._process_game_logic()
+
+    def _end_profiled_frame(self) :
+        self.profiler.end_frame(
+            asteroids=len(self.asteroids),
+            bullets=len(self.bullets),
+        )
+
+    def run(self, max_ticks=None) :
+        ticks = 0
+        start = time.perf_counter()
+        while (
+            self.running
+            and self.game_status != 0
+            and (max_ticks is None or ticks < max_ticks)
+        ) :
+            self.profiler.begin_frame()
+            self.step()
+            self.sounds.flush()
+            self._end_profiled_frame()
+            ticks += 1
+        seconds = time.perf_counter() - start
+        return {
+            "ticks": ticks,
+            "seconds": seconds,
+            "ticks_per_second": ticks / seconds if seconds else 0.0,
+            "score": self.player_score,
+            "won": self.game_status == 0 and self.spaceship is not None,
+            "lost": self.spaceship is None,
+        }
                 
     def _init_pygame(self) :
+        if self.headless :
+            pygame.font.init()
+            return
         pygame.init()
         pygame.display.set_caption("Space Rocks")
         
+    def _sound_backend(self) :
+        if self.headless or not pygame.mixer.get_init() :
+            return NullBackend()
+        return MixerBackend(self.SOUND_CHANNELS)
+
+    def _preload_assets(self) :
+        assets.preload(
+            sprites=["spaceship", "bullet", "asteroid"],
+            sounds=["laser"],
+            scaled=[
+                ("asteroid", scale) for scale in Asteroid.SIZE_TO_SCALE.values()
+            ],
+        )
+
+    def _build_atlas(self) :
+        # Every sprite a frame can use except the shield, whose frames
+        # are built on demand, and the opaque full-screen background
+        sprites = [assets.sprite("bullet")]
+        sprites += [
+            assets.scaled_sprite("asteroid", scale)
+            for scale in Asteroid.SIZE_TO_SCALE.values()
+        ]
+        sprites += [
+            frame for frame, _ in self.spaceship.rotations.build().frames.values()
+        ]
+        return SpriteAtlas(sprites)
+
     def _get_game_objects(self) :
         game_objects = [*self.asteroids, *self.bullets,]
         if self.spaceship :
@@ -53,11 +226,12 @@ class SpaceRocks :
         return game_objects
 
     def _handle_input(self) :
-        for event in pygame.event.get() :
+        for event in self.input_source.get_events() :
             if event.type == pygame.QUIT or (
                 event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
             ) :
-                quit()
+                self.running = False
+                return
             elif (
                 self.game_status == 1
                 and self.spaceship
@@ -70,66 +244,55 @@ class SpaceRocks :
                 and event.type == pygame.KEYUP
                 and event.key == pygame.K_p
             ) :
-                self.game_status = -1 if self.game_status == 1 else 1
-        is_key_pressed = pygame.key.get_pressed()
+                self._toggle_pause()
+            elif event.type == pygame.KEYUP and event.key == pygame.K_F3 :
+                self.profiler.toggle_overlay()
+        is_key_pressed = self.input_source.get_pressed()
         if self.spaceship and self.game_status == 1 :
             if is_key_pressed[pygame.K_RIGHT] :
                 self.spaceship.rotate(clockwise=True)
             elif is_key_pressed[pygame.K_LEFT] :
                 self.spaceship.rotate(clockwise=False)
             if is_key_pressed[pygame.K_UP] :
-                self.spaceship.accelerate()
+                self.spaceship.accelerate(TIME_STEP)
             if is_key_pressed[pygame.K_DOWN] :
-                self.spaceship.decelerate()  
+                self.spaceship.decelerate(TIME_STEP)  
     
-    def _game_paused(self) :
-        timer = 0
-        print("Paused Game")
-        while self.game_status == -1 :
-            timer += 1
+    def _toggle_pause(self) :
+        if self.game_status == 1 :
+            self.game_status = -1
+            self.pause_started = time.perf_counter()
+            self.paused_frame = None
             self.message_1 = "GAME PAUSED"
-            self.message_2 = f"{timer}"
-            self._draw()
-            time.sleep(1)
-            self._handle_input()
-        self.message_1 = ""
-        self.message_2 = ""
-        print("Resumed Game")
+            self._update_pause()
+            print("Paused Game")
+        elif self.game_status == -1 :
+            self.game_status = 1
+            self.paused_frame = None
+            self.message_1 = ""
+            self.message_2 = ""
+            print("Resumed Game")
+
+    def _update_pause(self) :
+        elapsed = time.perf_counter() - self.pause_started
+        self.message_2 = f"{int(elapsed) + 1}"
     
     def _process_game_logic(self) :
-        for game_object in self._get_game_objects() :
-            game_object.move(self.screen)
-        if self.spaceship :
-            self.shields.update(self.spaceship)  
-            for asteroid in self.asteroids :
-                if asteroid.collides_with(self.spaceship) :
-                    print("Shields @ " + str(self.shields.strength))
-                    self.bonus_count = 0
-                    if self.shields.strength == 0 :
-                        self.spaceship = None
-                        self.game_status = 0
-                        self.message_1 = "You lost!"
-                        break
-                    else :
-                        for _ in range(asteroid.size * 2) :
-                            self.spaceship.decelerate()
-                        self.shields.decrease_shield(self.spaceship)
-                        self.asteroids.remove(asteroid)
-                        asteroid.reflect(
-                            self.spaceship.direction,
-                        )
-        for bullet in self.bullets[:] :
-            for asteroid in self.asteroids[:] :
-                if asteroid.collides_with(bullet) :
-                    self.player_score += self.ASTEROID_VALUE // asteroid.size
-                    self.bonus_count += 1
-                    self.asteroids.remove(asteroid)
-                    self.bullets.remove(bullet)
-                    asteroid.split()
-                    break
-        for bullet in self.bullets[:] :
-            if not self.screen.get_rect().collidepoint(bullet.position) :
-                self.bullets.remove(bullet)
+        phase = self.profiler.phase
+        with phase("logic.move") :
+            self._move_game_objects()
+        with phase("logic.ship_collision") :
+            self._process_spaceship_collisions()
+        with phase("logic.bullet_collision") :
+            if self.entity_store :
+                self._process_bullet_collisions_batch()
+            else :
+                self._process_bullet_collisions()
+        with phase("logic.culling") :
+            if self.entity_store :
+                self._cull_bullets_batch()
+            else :
+                self._cull_bullets()
         if self.bonus_count == self.BONUS :
             self.player_score += self.BONUS_VALUE
             self.shields.increase_shield(self.spaceship)
@@ -137,24 +300,223 @@ class SpaceRocks :
         if not self.asteroids and self.spaceship :
             self.game_status = 0
             self.message_1 = "You won!"
-        if self.game_status == -1 :
-            self._game_paused()
     
+    def _process_spaceship_collisions(self) :
+        if not self.spaceship :
+            return
+        self.shields.update(self.spaceship)  
+        for asteroid in self._asteroids_near_spaceship() :
+            if asteroid.collides_with(self.spaceship) :
+                print("Shields @ " + str(self.shields.strength))
+                self.bonus_count = 0
+                if self.shields.strength == 0 :
+                    self.spaceship = None
+                    self.game_status = 0
+                    self.message_1 = "You lost!"
+                    break
+                else :
+                    for _ in range(asteroid.size * 2) :
+                        self.spaceship.decelerate()
+                    self.shields.decrease_shield(self.spaceship)
+                    self.asteroids.remove(asteroid)
+                    asteroid.reflect(
+                        self.spaceship.direction,
+                    )
+                    self._release(asteroid)
+
+    def _cull_bullets(self) :
+        for bullet in self.bullets[:] :
+            if not self.screen.get_rect().collidepoint(bullet.position) :
+                self.bullets.remove(bullet)
+                self._release(bullet)
+
+    def _move_game_objects(self) :
+        if self.entity_store is None :
+            for game_object in self._get_game_objects() :
+                game_object.move(self.screen, TIME_STEP)
+            return
+        self.entity_store.move(self.screen.get_size(), TIME_STEP * TICK_RATE)
+        if self.spaceship :
+            self.spaceship.move(self.screen, TIME_STEP)
+            self.shields.move(self.screen, TIME_STEP)
+
+    def _asteroids_near_spaceship(self) :
+        # The batch test only decides whether the scalar loop is needed;
+        # hits still go through it so removal order is unchanged
+        if self.entity_store is None or not self.asteroids :
+            return self.asteroids
+        if self.entity_store.overlapping(
+            self.spaceship.position, self.spaceship.radius, self.asteroids
+        ).any() :
+            return self.asteroids
+        return ()
+
+    def _release(self, *game_objects) :
+        for game_object in game_objects :
+            if self.entity_store :
+                self.entity_store.release(game_object)
+            if game_object.pool :
+                game_object.pool.release(game_object)
+
+    def _compact(self, game_objects, removed) :
+        # Filter in place (the spawn callbacks hold these exact lists) and
+        # release what was dropped in list order
+        kept = []
+        dropped = []
+        for game_object in game_objects :
+            (dropped if game_object in removed else kept).append(game_object)
+        game_objects[:] = kept
+        self._release(*dropped)
+
+    def pool_stats(self) :
+        return {
+            "asteroids": self.asteroid_pool.stats(),
+            "bullets": self.bullet_pool.stats(),
+        }
+
+    def _process_bullet_collisions(self) :
+        if not self.bullets or not self.asteroids :
+            return
+        largest_radius = max(
+            game_object.radius for game_object in [*self.asteroids, *self.bullets]
+        )
+        grid = SpatialHash(largest_radius * 2)
+        for index, asteroid in enumerate(self.asteroids) :
+            grid.insert(asteroid, index)
+        destroyed = set()
+        spent = set()
+        for bullet in self.bullets :
+            for index, asteroid in grid.query(bullet.position) :
+                if asteroid in destroyed :
+                    continue
+                if asteroid.collides_with(bullet) :
+                    self.player_score += self.ASTEROID_VALUE // asteroid.size
+                    self.bonus_count += 1
+                    destroyed.add(asteroid)
+                    spent.add(bullet)
+                    # Fragments are appended to self.asteroids and can still
+                    # be hit by later bullets this frame, so index them too.
+                    first_fragment = len(self.asteroids)
+                    asteroid.split()
+                    for index in range(first_fragment, len(self.asteroids)) :
+                        grid.insert(self.asteroids[index], index)
+                    break
+        if destroyed :
+            self._compact(self.asteroids, destroyed)
+        if spent :
+            self._compact(self.bullets, spent)
+
+    def _process_bullet_collisions_batch(self) :
+        if not self.bullets or not self.asteroids :
+            return
+        asteroids = list(self.asteroids)
+        hits = self.entity_store.overlaps(self.bullets, asteroids)
+        has_hit = hits.any(axis=1)
+        available = np.ones(len(asteroids), dtype=bool)
+        destroyed = set()
+        spent = set()
+        fragments = []
+        for row, bullet in enumerate(self.bullets) :
+            target = None
+            if has_hit[row] :
+                columns = np.flatnonzero(hits[row] & available)
+                if columns.size :
+                    target = asteroids[columns[0]]
+                    available[columns[0]] = False
+            if target is None :
+                # Fragments spawned earlier this frame come after every
+                # original asteroid in list order, so check them last
+                for fragment in fragments :
+                    if fragment not in destroyed and fragment.collides_with(bullet) :
+                        target = fragment
+                        break
+            if target is None :
+                continue
+            self.player_score += self.ASTEROID_VALUE // target.size
+            self.bonus_count += 1
+            destroyed.add(target)
+            spent.add(bullet)
+            first_fragment = len(self.asteroids)
+            target.split()
+            fragments.extend(self.asteroids[first_fragment:])
+        if destroyed :
+            self._compact(self.asteroids, destroyed)
+        if spent :
+            self._compact(self.bullets, spent)
+
+    def _cull_bullets_batch(self) :
+        if not self.bullets :
+            return
+        outside = self.entity_store.outside(self.bullets, self.screen.get_size())
+        if outside.any() :
+            gone = {b for b, out in zip(self.bullets, outside) if out}
+            self._compact(self.bullets, gone)
+
     def _draw(self) :
-        self.screen.blit(self.background, (0, 0))
-        for game_object in self._get_game_objects() :
-            game_object.draw(self.screen)
-        print_text(
+        phase = self.profiler.phase
+        if self.game_status == -1 :
+            with phase("draw.blit") :
+                # The scene is frozen while paused, so draw it once and reuse it
+                if self.paused_frame is None :
+                    self._draw_scene()
+                    self.paused_frame = self.screen.copy()
+                else :
+                    self.screen.blit(self.paused_frame, (0, 0))
+                self._draw_text()
+            self.full_redraw = True
+            with phase("draw.flip") :
+                pygame.display.flip()
+        elif self.dirty_rects and not self.full_redraw :
+            self._draw_dirty()
+        else :
+            with phase("draw.blit") :
+                rects = self._draw_scene()
+                rects += self._draw_text()
+            self.previous_rects = rects
+            self.full_redraw = False
+            with phase("draw.flip") :
+                pygame.display.flip()
+
+    def _draw_dirty(self) :
+        # Only last frame's rects are restored from the background and only
+        # old + new rects are pushed to the display. Blit rects are already
+        # clipped to the screen, and an object that wrapped around keeps
+        # separate rects on each edge rather than one spanning the screen.
+        with self.profiler.phase("draw.blit") :
+            rects = self._draw_scene(restore=self.previous_rects)
+            rects += self._draw_text()
+        with self.profiler.phase("draw.flip") :
+            pygame.display.update(self.previous_rects + rects)
+        self.previous_rects = rects
+
+    def _draw_scene(self, restore=None) :
+        if restore is None :
+            self.screen.blit(self.background, (0, 0))
+        else :
+            for rect in restore :
+                self.screen.blit(self.background, rect, rect)
+        sources = [
+            game_object.blit_source() for game_object in self._get_game_objects()
+        ]
+        if self.atlas :
+            sources = self.atlas.blit_sequence(sources)
+        rects = self.screen.blits(sources)
+        rects.append(print_text(
             self.screen,
             str(self.player_score),
             self.font,
             elev="top",
             align="right",
-            color="white"
-        )
+            color="white",
+            digits=True
+        ))
+        return rects
+
+    def _draw_text(self) :
+        rects = []
         if self.message_1 :
-            print_text(self.screen, self.message_1, self.font)
+            rects.append(print_text(self.screen, self.message_1, self.font))
         if self.message_2 :
-            print_text(self.screen, self.message_2, self.font, line=2)
-        pygame.display.flip()
-        self.clock.tick(60)
\ No newline at end of file
+            rects.append(print_text(self.screen, self.message_2, self.font, line=2))
+        rects += self.profiler.draw_overlay(self.screen)
+        return rects
@@ -1,43 +1,78 @@
+import random
 from pygame import Surface, SRCALPHA
 from pygame.font import Font
 from pygame.draw import circle
 from pygame.math import Vector2
-from pygame.transform import rotozoom
 
+from audio import play_now
 from utils import (
+    assets,
     get_random_velocity,
     get_angle_modifier,
-    load_sound,
-    load_sprite,
-    wrap_position,
-    print_text
+    print_text,
+    RotationCache
 )
 
 UP = Vector2(0, -1)
+# Speeds and accelerations are in pixels per tick at this rate; move(),
+# accelerate() and decelerate() scale them by dt so other step sizes
+# cover the same distance per second.
+TICK_RATE = 60
+TIME_STEP = 1 / TICK_RATE
 BLUE = (0, 0, 255)
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 WHITE = (255, 255, 255)
 
 class GameObject :
+    __slots__ = ("position", "sprite", "radius", "velocity", "offset", "pool")
+
     def __init__(self, position, sprite, velocity) :
+        # Set by ObjectPool.acquire() on pooled objects
+        self.pool = None
+        self._place(position, sprite, velocity)
+
+    def _place(self, position, sprite, velocity) :
         self.position = Vector2(position)
         self.sprite = sprite
         self.radius = sprite.get_width() / 2
+        self.offset = Vector2(self.radius)
         self.velocity = Vector2(velocity)
         
     def draw(self, surface) :
-        blit_position = self.position - Vector2(self.radius)
-        surface.blit(self.sprite, blit_position)
+        return surface.blit(*self.blit_source())
+
+    def blit_source(self) :
+        # The (sprite, position) pair draw() blits, so a renderer can batch
+        # many objects into one Surface.blits call
+        return self.sprite, self.position - self.offset
         
-    def move(self, surface) :
-        self.position = wrap_position(self.position + self.velocity, surface)
+    def move(self, surface, dt=TIME_STEP) :
+        # Same arithmetic as wrap_position(position + velocity * scale),
+        # done component-wise on the existing vector
+        scale = dt * TICK_RATE
+        width, height = surface.get_size()
+        position = self.position
+        velocity = self.velocity
+        position.x = (position.x + velocity.x * scale) % width
+        position.y = (position.y + velocity.y * scale) % height
+        # No-op for plain objects; writes back for EntityStore proxies,
+        # whose position is a detached copy
+        self.position = position
         
     def collides_with(self, other_obj) :
-        distance = self.position.distance_to(other_obj.position)
-        return distance < self.radius + other_obj.radius
+        radii = self.radius + other_obj.radius
+        return self.position.distance_squared_to(other_obj.position) < radii * radii
         
 class Spaceship(GameObject) :    
+    __slots__ = (
+        "create_bullet_callback",
+        "bullet_factory",
+        "laser_sound",
+        "play_sound",
+        "rotations",
+        "direction",
+    )
     MANEUVERABILITY = 3
     ACCELERATION = 0.1
     DECELERATION = 0.1
@@ -46,8 +81,16 @@ class Spaceship(GameObject) :
     BULLET_SPEED = 3
     def __init__(self, position, create_bullet_callback) :
         self.create_bullet_callback = create_bullet_callback
-        self.laser_sound = load_sound("laser")
-        sprite = load_sprite("spaceship")
+        # Swapped for a pool's acquire() when bullets are pooled
+        self.bullet_factory = Bullet
+        self.laser_sound = assets.sound("laser")
+        # Swapped for a SoundService's play() so shots are queued and mixed
+        # once per frame
+        self.play_sound = play_now
+        sprite = assets.sprite("spaceship")
+        # rotate() only turns in MANEUVERABILITY steps, so every heading
+        # the ship can face has a cached sprite
+        self.rotations = RotationCache(sprite, self.MANEUVERABILITY)
         # Make a copy of the original UP vector
         self.direction = Vector2(UP)
         super().__init__(position, sprite, Vector2(0))
@@ -57,88 +100,96 @@ class Spaceship(GameObject) :
         angle = self.MANEUVERABILITY * sign
         self.direction.rotate_ip(angle)
         
-    def draw(self, surface) :
+    def blit_source(self) :
         angle = self.direction.angle_to(UP)
-        rotated_surface = rotozoom(self.sprite, angle, 1.0)
-        rotated_surface_size = Vector2(rotated_surface.get_size())
-        blit_position = self.position - rotated_surface_size * 0.5
-        surface.blit(rotated_surface, blit_position)
+        rotated_surface, offset = self.rotations.get(angle)
+        return rotated_surface, self.position - offset
     
-    def accelerate(self) :
-        self.velocity += self.direction * self.ACCELERATION
-        if self.velocity.length() > self.MAX_SPEED :
-            self.velocity.scale_to_length(self.MAX_SPEED)
+    def accelerate(self, dt=TIME_STEP) :
+        scale = self.ACCELERATION * dt * TICK_RATE
+        velocity = self.velocity
+        velocity.x += self.direction.x * scale
+        velocity.y += self.direction.y * scale
+        if velocity.length_squared() > self.MAX_SPEED * self.MAX_SPEED :
+            velocity.scale_to_length(self.MAX_SPEED)
 
-    def decelerate(self) :
+    def decelerate(self, dt=TIME_STEP) :
+        deceleration = self.DECELERATION * dt * TICK_RATE
         if not self.velocity == (self.MIN_SPEED, self.MIN_SPEED) :
-            dec_factor = self.velocity.x * self.DECELERATION
+            dec_factor = self.velocity.x * deceleration
             self.velocity.x = self.MIN_SPEED if self.velocity.x == self.MIN_SPEED else (
                 self.velocity.x - dec_factor
             )
-            dec_factor = self.velocity.y * self.DECELERATION
+            dec_factor = self.velocity.y * deceleration
             self.velocity.y = self.MIN_SPEED if self.velocity.y == self.MIN_SPEED else (
                 self.velocity.y - dec_factor
             )
     
     def shoot(self) :
         bullet_velocity = self.direction * self.BULLET_SPEED + self.velocity
-        bullet = Bullet(self.position, bullet_velocity)
+        bullet = self.bullet_factory(self.position, bullet_velocity)
         self.create_bullet_callback(bullet)
-        self.laser_sound.play()
+        self.play_sound(self.laser_sound)
 
 
 class Shield(GameObject) :
+    __slots__ = ("font", "strength", "color", "size", "r", "ticker", "frames")
     SHIELD_MAX = 10
     TICKER_START = 0
     TICKER_MAX = 6
-    def __init__(self, spaceship, size=SHIELD_MAX) :
+    def __init__(self, spaceship, size=None) :
         self.font = Font(None, 18)
         self.position = spaceship.position
         self.velocity = spaceship.velocity
-        self.strength = size
+        # Read at call time so SHIELD_MAX can be tuned per run
+        self.strength = self.SHIELD_MAX if size is None else size
         self.color = BLUE
         self.size = spaceship.sprite.get_width() + self.strength + 20
         self.r = self.size // 2
-        self.sprite = Surface((self.size, self.size), SRCALPHA)
         self.ticker = self.TICKER_START
-        self.image = circle(
-            self.sprite, 
-            self.color,
-            (self.r, self.r),
-            self.r,
-            self.strength
-        )
+        # Prebuilt shield surfaces keyed by (strength, color)
+        self.frames = {}
+        self.sprite = self._get_frame()
         super().__init__(self.position, self.sprite, self.velocity)
-    
-    def draw(self, surface) :
-        blit_position = self.position - Vector2(self.r)
-        self.sprite = Surface((self.size, self.size), SRCALPHA)
+        self.offset = Vector2(self.r)
+
+    def _get_frame(self) :
+        key = (self.strength, self.color)
+        frame = self.frames.get(key)
+        if frame is None :
+            frame = Surface((self.size, self.size), SRCALPHA)
+            if self.strength > 0 :
+                circle(
+                    frame,
+                    self.color,
+                    (self.r, self.r),
+                    self.r,
+                    self.strength
+                )
+                print_text(
+                    frame,
+                    str(self.strength),
+                    self.font,
+                    elev="bottom",
+                    color=WHITE
+                )
+            self.frames[key] = frame
+        return frame
+
+    def blit_source(self) :
         if self.ticker < 0 :
             self.color = RED
         elif self.ticker > 0 :
             self.color = GREEN
         else :
             self.color = BLUE
-        if self.strength > 0 :
-            self.image = circle(
-                self.sprite,
-                self.color,
-                (self.r, self.r),
-                self.r,
-                self.strength
-            )
-            print_text(
-                self.sprite,
-                str(self.strength),
-                self.font,
-                elev="bottom",
-                color=WHITE
-            )
-        surface.blit(self.sprite, blit_position)
+        self.sprite = self._get_frame()
+        return self.sprite, self.position - self.offset
     
     def update(self, spaceship) :
-        self.position = spaceship.position
-        self.velocity = spaceship.velocity
+        # Copy rather than share: move() now updates vectors in place
+        self.position[:] = spaceship.position
+        self.velocity[:] = spaceship.velocity
         if self.ticker != 0 :
             tick = 1 if self.ticker < 0 else -1
             self.ticker += tick
@@ -155,38 +206,68 @@ class Shield(GameObject) :
 
 
 class Bullet(GameObject) :
+    __slots__ = ()
+
     def __init__(self, position, velocity) :
-        super().__init__(position, load_sprite("bullet"), velocity)
+        super().__init__(position, assets.sprite("bullet"), velocity)
+
+    def reset(self, position, velocity) :
+        self._place(position, assets.sprite("bullet"), velocity)
     
-    def move(self, surface) :
-        self.position = self.position + self.velocity
+    def move(self, surface, dt=TIME_STEP) :
+        scale = dt * TICK_RATE
+        position = self.position
+        position.x += self.velocity.x * scale
+        position.y += self.velocity.y * scale
+        self.position = position
 
 
 class Asteroid(GameObject) :
+    __slots__ = ("rng", "create_asteroid_callback", "direction", "size")
     SPLITS_INTO = 2
-    def __init__(self, position, create_asteroid_callback, size=3, vector=None) :
-        self.create_asteroid_callback = create_asteroid_callback
-        self.direction = vector if vector else get_random_velocity(1, 3)
-        self.size = size
-        size_to_scale = {
-            3:1,
-            2:0.5,
-            1:0.25,
-        }
-        scale = size_to_scale[size]
-        sprite = rotozoom(load_sprite("asteroid"), 0, scale)
+    SIZE_TO_SCALE = {
+        3:1,
+        2:0.5,
+        1:0.25,
+    }
+    def __init__(
+        self, position, create_asteroid_callback, size=3, vector=None, rng=random
+    ) :
+        sprite = self._configure(create_asteroid_callback, size, vector, rng)
         trajectory = self.direction
         super().__init__(
             position, sprite, trajectory
         )
+
+    def reset(
+        self, position, create_asteroid_callback, size=3, vector=None, rng=random
+    ) :
+        sprite = self._configure(create_asteroid_callback, size, vector, rng)
+        self._place(position, sprite, self.direction)
+
+    def _configure(self, create_asteroid_callback, size, vector, rng) :
+        # Fragments share their parent's generator
+        self.rng = rng
+        self.create_asteroid_callback = create_asteroid_callback
+        self.direction = vector if vector else get_random_velocity(1, 3, rng=rng)
+        self.size = size
+        return assets.scaled_sprite("asteroid", self.SIZE_TO_SCALE[size])
+
+    def _spawn(self, *args) :
+        # Fragments come from the same pool as their parent, if any
+        if self.pool :
+            return self.pool.acquire(*args)
+        return type(self)(*args)
     
     def split(self) :
         if self.size > 1 :
             for _ in range(self.SPLITS_INTO) :
-                asteroid = Asteroid(
+                asteroid = self._spawn(
                     self.position, 
                     self.create_asteroid_callback, 
-                    self.size - 1
+                    self.size - 1,
+                    None,
+                    self.rng
                 )
                 self.create_asteroid_callback(asteroid)
                 
@@ -196,7 +277,7 @@ class Asteroid(GameObject) :
         new_velocity = curr_velocity * ACC_FACTOR
         if self.size > 1 :
             for a in range(self.SPLITS_INTO) :
-                angle_modifier = get_angle_modifier()
+                angle_modifier = get_angle_modifier(self.rng)
                 if a % 2 :
                     new_angle = (
                         -ship_vector.x - angle_modifier,
@@ -209,10 +290,11 @@ class Asteroid(GameObject) :
                     )
                 new_vector = ship_vector.reflect(new_angle)
                 new_vector = new_vector.scale_to_length(new_velocity)
-                asteroid = Asteroid(
+                asteroid = self._spawn(
                     self.position, 
                     self.create_asteroid_callback, 
                     self.size - 1,
-                    new_vector
+                    new_vector,
+                    self.rng
                 )
                 self.create_asteroid_callback(asteroid)
\ No newline at end of file
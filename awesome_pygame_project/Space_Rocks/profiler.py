@@ -0,0 +1,180 @@
+import csv
+import json
+import sys
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from pygame import Color
+from pygame.font import Font
+
+NULL_PHASE = nullcontext()
+OVERLAY_COLOR = Color("yellow")
+
+
+class _Phase :
+    def __init__(self, profiler, name) :
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) :
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) :
+        self.profiler._add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler :
+    # Records per-phase wall time, entity counts and net allocated-block
+    # growth for each frame into a ring buffer. Net growth is what a frame
+    # left allocated, not how much it allocated: temporaries freed within
+    # the frame don't show up. While disabled, phase() hands back a shared
+    # no-op context and begin/end_frame return immediately.
+    PHASES = (
+        "input",
+        "logic",
+        "logic.move",
+        "logic.ship_collision",
+        "logic.bullet_collision",
+        "logic.culling",
+        "draw",
+        "draw.blit",
+        "draw.flip",
+    )
+
+    def __init__(self, enabled=False, history=300) :
+        self.enabled = enabled
+        self.visible = False
+        self.frames = deque(maxlen=history)
+        self.current = None
+        self.phases = {name: _Phase(self, name) for name in self.PHASES}
+        self.font = None
+        # Whether profiling was on before the overlay switched it on
+        self._enabled_before_overlay = enabled
+        self._frame_start = 0.0
+        self._blocks_start = 0
+
+    def toggle_overlay(self) :
+        self.visible = not self.visible
+        if self.visible :
+            self._enabled_before_overlay = self.enabled
+            self.enabled = True
+        else :
+            self.enabled = self._enabled_before_overlay
+            if not self.enabled :
+                self.current = None
+
+    def phase(self, name) :
+        if self.current is None :
+            return NULL_PHASE
+        phase = self.phases.get(name)
+        if phase is None :
+            phase = self.phases[name] = _Phase(self, name)
+        return phase
+
+    def _add(self, name, seconds) :
+        if self.current is not None :
+            phases = self.current["phases"]
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def begin_frame(self) :
+        if not self.enabled :
+            return
+        self.current = {"phases": {}}
+        self._blocks_start = sys.getallocatedblocks()
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self, **counts) :
+        if self.current is None :
+            return
+        frame = self.current
+        frame["total"] = time.perf_counter() - self._frame_start
+        frame["net_blocks"] = sys.getallocatedblocks() - self._blocks_start
+        frame["counts"] = counts
+        self.frames.append(frame)
+        self.current = None
+
+    def summary(self) :
+        if not self.frames :
+            return {}
+        frame_count = len(self.frames)
+        phases = {}
+        for frame in self.frames :
+            for name, seconds in frame["phases"].items() :
+                phases[name] = phases.get(name, 0.0) + seconds
+        return {
+            "frames": frame_count,
+            "total_ms": 1000 * sum(f["total"] for f in self.frames) / frame_count,
+            "phases_ms": {
+                name: 1000 * seconds / frame_count
+                for name, seconds in phases.items()
+            },
+            "net_blocks": sum(f["net_blocks"] for f in self.frames) / frame_count,
+            "counts": self.frames[-1]["counts"],
+        }
+
+    def _rows(self) :
+        names = sorted({name for f in self.frames for name in f["phases"]})
+        count_names = sorted({name for f in self.frames for name in f["counts"]})
+        header = [
+            "frame",
+            "total_ms",
+            *[f"{name}_ms" for name in names],
+            *count_names,
+            "net_blocks",
+        ]
+        rows = []
+        for index, frame in enumerate(self.frames) :
+            rows.append([
+                index,
+                1000 * frame["total"],
+                *[1000 * frame["phases"].get(n, 0.0) for n in names],
+                *[frame["counts"].get(n, 0) for n in count_names],
+                frame["net_blocks"],
+            ])
+        return header, rows
+
+    def export(self, path) :
+        path = str(path)
+        if path.endswith(".csv") :
+            header, rows = self._rows()
+            with open(path, "w", newline="") as csv_file :
+                writer = csv.writer(csv_file)
+                writer.writerow(header)
+                writer.writerows(rows)
+        else :
+            with open(path, "w") as json_file :
+                json.dump(
+                    {"summary": self.summary(), "frames": list(self.frames)},
+                    json_file,
+                    indent=2,
+                )
+
+    def draw_overlay(self, surface) :
+        if not self.visible or not self.frames :
+            return []
+        if self.font is None :
+            self.font = Font(None, 20)
+        summary = self.summary()
+        total = summary["total_ms"]
+        lines = [f"frame {total:.2f} ms ({1000 / total if total else 0:.0f} fps)"]
+        for name in self.PHASES :
+            if name in summary["phases_ms"] :
+                lines.append(f"{name} {summary['phases_ms'][name]:.2f} ms")
+        lines.append(" ".join(f"{k} {v}" for k, v in summary["counts"].items()))
+        lines.append(f"net blocks/frame {summary['net_blocks']:+.1f}")
+        # Rendered straight from the font: these strings change every frame
+        # and would only churn the shared text_cache that keeps the HUD.
+        # Lines sit on a fixed line height since glyph heights vary.
+        line_height = self.font.get_linesize()
+        rects = []
+        for index, text in enumerate(lines) :
+            top = index * line_height
+            if top + line_height > surface.get_height() :
+                break
+            text_surface = self.font.render(text, True, OVERLAY_COLOR)
+            rects.append(surface.blit(text_surface, (0, top)))
+        return rects
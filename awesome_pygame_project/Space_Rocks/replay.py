@@ -0,0 +1,141 @@
+import struct
+
+import pygame
+
+from controls import CallbackInput, key_event
+from game import SpaceRocks
+
+MAGIC = b"SRR2"
+# Version 1 files cut ticks to 15 events and had no escaped counts
+LEGACY_MAGIC = b"SRR1"
+# Magic, then the game seed
+HEADER = struct.Struct("<4sQ")
+# Held keys as polled by SpaceRocks._handle_input, one bit each
+HELD_KEYS = (pygame.K_RIGHT, pygame.K_LEFT, pygame.K_UP, pygame.K_DOWN)
+# Events _handle_input acts on, stored as one-byte codes in arrival order
+SHOOT, PAUSE, OVERLAY, QUIT = 1, 2, 3, 4
+# An event count of ESCAPE or more doesn't fit the header nibble: the
+# nibble holds ESCAPE and the rest of the count follows in bytes of 255
+# ended by one below 255
+ESCAPE = 15
+
+
+def _event_code(event) :
+    if event.type == pygame.QUIT :
+        return QUIT
+    if event.type == pygame.KEYDOWN :
+        if event.key == pygame.K_ESCAPE :
+            return QUIT
+        if event.key == pygame.K_SPACE :
+            return SHOOT
+    if event.type == pygame.KEYUP :
+        if event.key == pygame.K_p :
+            return PAUSE
+        if event.key == pygame.K_F3 :
+            return OVERLAY
+    return None
+
+
+def _code_event(code) :
+    if code == SHOOT :
+        return key_event(pygame.K_SPACE)
+    if code == PAUSE :
+        return key_event(pygame.K_p, down=False)
+    if code == OVERLAY :
+        return key_event(pygame.K_F3, down=False)
+    return pygame.event.Event(pygame.QUIT)
+
+
+class InputRecorder :
+    # Wraps another input source and records each tick compactly: one byte
+    # holding the held-key bits (low nibble) and the event count (high
+    # nibble), followed by one byte per event. Idle ticks cost one byte;
+    # busy ones (ESCAPE or more events) carry their count in extra bytes.
+    def __init__(self, source, seed) :
+        self.source = source
+        self.seed = seed
+        self.data = bytearray()
+        self.codes = []
+
+    def get_events(self) :
+        events = self.source.get_events()
+        self.codes = [
+            code for code in map(_event_code, events) if code is not None
+        ]
+        if QUIT in self.codes :
+            # _handle_input stops before polling held keys on quit
+            self.codes = self.codes[:self.codes.index(QUIT) + 1]
+            self._write_tick(0)
+        return events
+
+    def get_pressed(self) :
+        pressed = self.source.get_pressed()
+        held = 0
+        for bit, key in enumerate(HELD_KEYS) :
+            if pressed[key] :
+                held |= 1 << bit
+        self._write_tick(held)
+        return pressed
+
+    def _write_tick(self, held) :
+        count = len(self.codes)
+        self.data.append(held | min(count, ESCAPE) << 4)
+        if count >= ESCAPE :
+            extra = count - ESCAPE
+            while extra >= 255 :
+                self.data.append(255)
+                extra -= 255
+            self.data.append(extra)
+        self.data.extend(self.codes)
+        self.codes = []
+
+    def to_bytes(self) :
+        return HEADER.pack(MAGIC, self.seed) + bytes(self.data)
+
+    def save(self, path) :
+        with open(path, "wb") as replay_file :
+            replay_file.write(self.to_bytes())
+
+
+def decode(data) :
+    magic, seed = HEADER.unpack_from(data)
+    if magic not in (MAGIC, LEGACY_MAGIC) :
+        raise ValueError("Not a Space Rocks replay")
+    escaped = magic == MAGIC
+    ticks = []
+    offset = HEADER.size
+    while offset < len(data) :
+        header = data[offset]
+        count = header >> 4
+        if escaped and count == ESCAPE :
+            while True :
+                offset += 1
+                count += data[offset]
+                if data[offset] < 255 :
+                    break
+        codes = data[offset + 1:offset + 1 + count]
+        offset += 1 + count
+        held = [key for bit, key in enumerate(HELD_KEYS) if header & (1 << bit)]
+        ticks.append(([_code_event(code) for code in codes], held))
+    return seed, ticks
+
+
+class ReplayInput(CallbackInput) :
+    def __init__(self, ticks) :
+        ticks = iter(ticks)
+        super().__init__(lambda: next(ticks, None))
+
+
+def load(path) :
+    with open(path, "rb") as replay_file :
+        return decode(replay_file.read())
+
+
+def replay(path, **game_options) :
+    seed, ticks = load(path)
+    game = SpaceRocks(
+        headless=True, seed=seed, input_source=ReplayInput(ticks), **game_options
+    )
+    stats = game.run()
+    stats["recorded_ticks"] = len(ticks)
+    return game, stats
@@ -0,0 +1,131 @@
+import os
+import random
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from controls import ScriptedInput, key_event
+from game import SpaceRocks
+from replay import InputRecorder, ReplayInput, decode
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setUpModule() :
+    # Assets load relative to the project directory, as with `python Space_Rocks`
+    os.chdir(PROJECT_DIR)
+
+
+def nested_scan(game) :
+    # The bullet/asteroid pass as it was before the spatial hash
+    for bullet in game.bullets[:] :
+        for asteroid in game.asteroids[:] :
+            if asteroid.collides_with(bullet) :
+                game.player_score += game.ASTEROID_VALUE // asteroid.size
+                game.bonus_count += 1
+                game.asteroids.remove(asteroid)
+                game.bullets.remove(bullet)
+                asteroid.split()
+                break
+
+
+def crowded_game(seed, entity_store=False) :
+    # A few dozen asteroids and bullets packed close enough that most
+    # bullets hit something and fragments get hit in the same pass
+    game = SpaceRocks(headless=True, seed=seed, entity_store=entity_store)
+    layout = random.Random(seed)
+    for _ in range(layout.randrange(5, 30)) :
+        position = (layout.uniform(200, 500), layout.uniform(150, 400))
+        game.asteroids.append(
+            game.asteroid_pool.acquire(
+                position, game.asteroids.append, layout.randint(1, 3), None, game.rng
+            )
+        )
+    for _ in range(layout.randrange(1, 40)) :
+        position = (layout.uniform(200, 500), layout.uniform(150, 400))
+        velocity = (layout.uniform(-3, 3), layout.uniform(-3, 3))
+        game.bullets.append(game.bullet_pool.acquire(position, velocity))
+    return game
+
+
+def snapshot(game) :
+    return (
+        game.player_score,
+        game.bonus_count,
+        [(a.size, round(a.position.x, 6), round(a.position.y, 6)) for a in game.asteroids],
+        [(round(b.position.x, 6), round(b.position.y, 6)) for b in game.bullets],
+    )
+
+
+class BulletCollisionTests(unittest.TestCase) :
+    STATES = 200
+
+    def assert_matches_nested_scan(self, entity_store) :
+        for seed in range(self.STATES) :
+            expected = crowded_game(seed)
+            nested_scan(expected)
+            game = crowded_game(seed, entity_store)
+            if entity_store :
+                game._process_bullet_collisions_batch()
+            else :
+                game._process_bullet_collisions()
+            self.assertEqual(snapshot(game), snapshot(expected), f"seed {seed}")
+
+    def test_spatial_hash_matches_nested_scan(self) :
+        self.assert_matches_nested_scan(entity_store=False)
+
+    def test_entity_store_matches_nested_scan(self) :
+        self.assert_matches_nested_scan(entity_store=True)
+
+
+def random_script(seed, ticks) :
+    rng = random.Random(seed)
+    keys = [pygame.K_RIGHT, pygame.K_LEFT, pygame.K_UP, pygame.K_DOWN]
+    script = []
+    for tick in range(ticks) :
+        shots = 40 if tick == 10 else rng.choice([0, 0, 0, 1, 2])
+        events = [key_event(pygame.K_SPACE) for _ in range(shots)]
+        held = [key for key in keys if rng.random() < 0.3]
+        script.append((events, held))
+    return script
+
+
+def play(game) :
+    # One state per tick, so a replay that drifts fails where it drifts
+    trace = []
+    while game.running and game.game_status != 0 :
+        game.run(max_ticks=1)
+        trace.append((
+            game.player_score,
+            [(round(a.position.x, 6), round(a.position.y, 6)) for a in game.asteroids],
+            [(round(b.position.x, 6), round(b.position.y, 6)) for b in game.bullets],
+        ))
+    return trace
+
+
+class ReplayTests(unittest.TestCase) :
+    def test_replay_reproduces_the_recorded_game(self) :
+        recorder = InputRecorder(ScriptedInput(random_script(7, 600)), 7)
+        recorded = play(SpaceRocks(headless=True, seed=7, input_source=recorder))
+        seed, ticks = decode(recorder.to_bytes())
+        game = SpaceRocks(headless=True, seed=seed, input_source=ReplayInput(ticks))
+        self.assertEqual(play(game), recorded)
+
+    def test_busy_ticks_keep_every_event(self) :
+        for count in (14, 15, 16, 269, 270, 300) :
+            recorder = InputRecorder(
+                ScriptedInput([([key_event(pygame.K_SPACE)] * count, [pygame.K_UP])]), 0
+            )
+            recorder.get_events()
+            recorder.get_pressed()
+            _, ticks = decode(recorder.to_bytes())
+            events, held = ticks[0]
+            self.assertEqual(len(events), count)
+            self.assertEqual(held, [pygame.K_UP])
+
+
+if __name__ == "__main__" :
+    unittest.main()
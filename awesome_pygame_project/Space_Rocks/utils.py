@@ -1,14 +1,20 @@
 import random
-from pygame import Color
+from collections import OrderedDict
+from pygame import BLEND_RGBA_MAX, Color, Rect, Surface, SRCALPHA
+from pygame.display import get_surface
 from pygame.image import load
 from pygame.math import Vector2
-from pygame.mixer import Sound
+from pygame.mixer import Sound, get_init
+from pygame.transform import rotozoom
 
 def load_sprite(name, with_alpha=True) :
     path = f"assets/sprites/{name}.png"
     loaded_sprite = load(path)
     
-    if with_alpha :
+    # Pixel format conversion needs a display; headless games skip it
+    if get_surface() is None :
+        return loaded_sprite
+    elif with_alpha :
         return loaded_sprite.convert_alpha()
     else :
         return loaded_sprite.convert()
@@ -18,26 +24,187 @@ def wrap_position(position, surface) :
     w, h = surface.get_size()
     return Vector2(x % w, y % h)
     
-def get_random_position(surface) :
+# The random helpers take an optional `rng` (a random.Random) so each game
+# can own a seeded generator; they fall back to the global random module.
+def get_random_position(surface, rng=random) :
     return Vector2(
-        random.randrange(surface.get_width()),
-        random.randrange(surface.get_height()),
+        rng.randrange(surface.get_width()),
+        rng.randrange(surface.get_height()),
     )
     
-def get_random_velocity(min_speed, max_speed, min_angle=0, max_angle=360) :
-    speed = random.randint(min_speed, max_speed)
-    angle = random.randrange(min_angle, max_angle)
+def get_random_velocity(min_speed, max_speed, min_angle=0, max_angle=360, rng=random) :
+    speed = rng.randint(min_speed, max_speed)
+    angle = rng.randrange(min_angle, max_angle)
     return Vector2(speed, 0).rotate(angle)
     
-def get_angle_modifier() :
-    return random.randrange(5, 10) / 10
+def get_angle_modifier(rng=random) :
+    return rng.randrange(5, 10) / 10
+
+class NullSound :
+    def play(self, *args, **kwargs) :
+        return None
+
 
 def load_sound(name) :
+    if not get_init() :
+        return NullSound()
     path = f"assets/sounds/{name}.wav"
     return Sound(path)
     
-def print_text(surface, text, font, line=1, elev=None, align=None, color=Color("tomato")) :
-    text_surface = font.render(text, True, color)
+class AssetRegistry :
+    # Loads every sprite and sound once and memoizes derived variants
+    # (e.g. scaled copies) so spawning objects never touches the disk.
+    def __init__(self) :
+        self.sprites = {}
+        self.sounds = {}
+        self.variants = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, cache, key, loader) :
+        if key in cache :
+            self.hits += 1
+            return cache[key]
+        self.misses += 1
+        asset = cache[key] = loader()
+        return asset
+
+    def sprite(self, name, with_alpha=True) :
+        return self._lookup(
+            self.sprites,
+            (name, with_alpha),
+            lambda: load_sprite(name, with_alpha),
+        )
+
+    def sound(self, name) :
+        return self._lookup(self.sounds, name, lambda: load_sound(name))
+
+    def variant(self, name, key, build, with_alpha=True) :
+        return self._lookup(
+            self.variants,
+            (name, with_alpha, key),
+            lambda: build(self.sprite(name, with_alpha)),
+        )
+
+    def scaled_sprite(self, name, scale, with_alpha=True) :
+        return self.variant(
+            name,
+            ("scale", scale),
+            lambda sprite: rotozoom(sprite, 0, scale),
+            with_alpha,
+        )
+
+    def preload(self, sprites=(), sounds=(), scaled=()) :
+        for name in sprites :
+            self.sprite(name)
+        for name in sounds :
+            self.sound(name)
+        for name, scale in scaled :
+            self.scaled_sprite(name, scale)
+
+    def stats(self) :
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sprites": len(self.sprites),
+            "sounds": len(self.sounds),
+            "variants": len(self.variants),
+        }
+
+    def clear(self) :
+        self.sprites.clear()
+        self.sounds.clear()
+        self.variants.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+assets = AssetRegistry()
+
+
+class TextCache :
+    # Bounded LRU of rendered text surfaces. Numeric strings can optionally
+    # be composed from cached per-digit glyphs, so a changing score never
+    # needs a full font.render.
+    DIGITS = "0123456789"
+
+    def __init__(self, max_size=128, max_glyph_sets=16) :
+        self.max_size = max_size
+        self.max_glyph_sets = max_glyph_sets
+        self.surfaces = OrderedDict()
+        # Digit glyphs per (font, color, antialias), also LRU-bounded
+        self.glyphs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True, digits=False) :
+        color = tuple(Color(color))
+        key = (font, text, color, antialias)
+        text_surface = self.surfaces.get(key)
+        if text_surface is not None :
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return text_surface
+        self.misses += 1
+        if digits and text.isdigit() :
+            text_surface = self._compose_digits(font, text, color, antialias)
+        else :
+            text_surface = font.render(text, antialias, color)
+        self.surfaces[key] = text_surface
+        while len(self.surfaces) > self.max_size :
+            self.surfaces.popitem(last=False)
+        return text_surface
+
+    def _glyph_atlas(self, font, color, antialias) :
+        key = (font, color, antialias)
+        atlas = self.glyphs.get(key)
+        if atlas is not None :
+            self.glyphs.move_to_end(key)
+            return atlas
+        atlas = {
+            digit: (font.render(digit, antialias, color), font.size(digit)[0])
+            for digit in self.DIGITS
+        }
+        self.glyphs[key] = atlas
+        while len(self.glyphs) > self.max_glyph_sets :
+            self.glyphs.popitem(last=False)
+        return atlas
+
+    def _compose_digits(self, font, text, color, antialias) :
+        atlas = self._glyph_atlas(font, color, antialias)
+        width = sum(atlas[digit][1] for digit in text)
+        text_surface = Surface((width, font.get_height()), SRCALPHA)
+        x = 0
+        for digit in text :
+            glyph, advance = atlas[digit]
+            # Copy the glyph's pixels rather than alpha-blending them onto
+            # the transparent surface, which would darken antialiased edges
+            text_surface.blit(glyph, (x, 0), special_flags=BLEND_RGBA_MAX)
+            x += advance
+        return text_surface
+
+    def clear(self) :
+        self.surfaces.clear()
+        self.glyphs.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+text_cache = TextCache()
+
+
+def print_text(
+    surface,
+    text,
+    font,
+    line=1,
+    elev=None,
+    align=None,
+    color=Color("tomato"),
+    antialias=True,
+    digits=False,
+) :
+    text_surface = text_cache.render(font, text, color, antialias, digits)
     rect = text_surface.get_rect()
     if elev == "top" :
         text_pos_y = rect.h / 2
@@ -52,4 +219,141 @@ def print_text(surface, text, font, line=1, elev=None, align=None, color=Color("
     else :
         text_pos_x = surface.get_width() / 2
     rect.center = Vector2(text_pos_x, text_pos_y + text_surface.get_height() * (line - 1))
-    surface.blit(text_surface, rect)
\ No newline at end of file
+    return surface.blit(text_surface, rect)
+
+class SpatialHash :
+    # Uniform grid broad phase. With cells at least as wide as the largest
+    # pair of radii, two circles can only overlap if they sit in the same
+    # or neighbouring cells.
+    def __init__(self, cell_size) :
+        self.cell_size = max(cell_size, 1)
+        self.cells = {}
+
+    def _cell(self, position) :
+        return (
+            int(position[0] // self.cell_size),
+            int(position[1] // self.cell_size),
+        )
+
+    def insert(self, game_object, index) :
+        key = self._cell(game_object.position)
+        self.cells.setdefault(key, []).append((index, game_object))
+
+    def query(self, position) :
+        # Candidates come back in insertion order so the caller can keep
+        # the same "first match wins" rule as a linear scan.
+        cx, cy = self._cell(position)
+        candidates = []
+        for x in (cx - 1, cx, cx + 1) :
+            for y in (cy - 1, cy, cy + 1) :
+                candidates.extend(self.cells.get((x, y), ()))
+        candidates.sort(key=lambda entry: entry[0])
+        return candidates
+
+
+class RotationCache :
+    # Rotated copies of a sprite keyed by angle snapped to `step` degrees,
+    # each stored with the offset that centres it on the object's position.
+    def __init__(self, sprite, step) :
+        self.sprite = sprite
+        self.step = step
+        self.frames = {}
+
+    def _key(self, angle) :
+        return round(angle / self.step) * self.step % 360
+
+    def get(self, angle) :
+        key = self._key(angle)
+        frame = self.frames.get(key)
+        if frame is None :
+            rotated_surface = rotozoom(self.sprite, key, 1.0)
+            offset = Vector2(rotated_surface.get_size()) * 0.5
+            frame = self.frames[key] = (rotated_surface, offset)
+        return frame
+
+    def build(self) :
+        angle = 0
+        while angle < 360 :
+            self.get(angle)
+            angle += self.step
+        return self
+
+
+class ObjectPool :
+    # Free list of reusable objects. acquire() reinitialises a released
+    # object with its reset() method instead of allocating a new one;
+    # releases beyond max_size are left for the garbage collector.
+    def __init__(self, factory, max_size=256) :
+        self.factory = factory
+        self.max_size = max_size
+        self.free = []
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args) :
+        if self.free :
+            game_object = self.free.pop()
+            game_object.reset(*args)
+            self.reused += 1
+        else :
+            game_object = self.factory(*args)
+            game_object.pool = self
+            self.created += 1
+        self.in_use += 1
+        return game_object
+
+    def release(self, game_object) :
+        self.in_use -= 1
+        if len(self.free) < self.max_size :
+            self.free.append(game_object)
+
+    def stats(self) :
+        return {
+            "in_use": self.in_use,
+            "free": len(self.free),
+            "max_size": self.max_size,
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+
+class SpriteAtlas :
+    # Packs sprites into one surface using simple shelf packing. regions
+    # maps each original sprite to its area of the atlas, so a draw call
+    # can swap (sprite, dest) for (atlas, dest, area).
+    def __init__(self, sprites, max_width=1024) :
+        self.regions = {}
+        placements = []
+        x = y = shelf_height = width = 0
+        for sprite in sorted(set(sprites), key=lambda s: -s.get_height()) :
+            w, h = sprite.get_size()
+            if x and x + w > max_width :
+                x = 0
+                y += shelf_height
+                shelf_height = 0
+            placements.append((sprite, Rect(x, y, w, h)))
+            x += w
+            width = max(width, x)
+            shelf_height = max(shelf_height, h)
+        self.surface = Surface((max(width, 1), max(y + shelf_height, 1)), SRCALPHA)
+        if get_surface() is not None :
+            self.surface = self.surface.convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        for sprite, rect in placements :
+            # MAX against transparent black copies pixels and alpha
+            # unchanged, where a normal blit would blend them
+            self.surface.blit(sprite, rect, special_flags=BLEND_RGBA_MAX)
+            self.regions[sprite] = rect
+
+    def blit_sequence(self, sources) :
+        atlas = self.surface
+        regions = self.regions
+        sequence = []
+        for sprite, dest in sources :
+            area = regions.get(sprite)
+            if area is None :
+                sequence.append((sprite, dest))
+            else :
+                sequence.append((atlas, dest, area))
+        return sequence
@@ -0,0 +1,134 @@
+"""Benchmark concurrent SQLite reads while a writer is busy.
+
+Compares the stock setup (rollback journal, a new connection per request)
+with the tuned one from settings (SQLITE_PRAGMAS applied once to
+persistent connections):
+
+    python dbbench.py --readers 8 --duration 5
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from portfolio.settings import SQLITE_PRAGMAS
+
+ROWS = 20000
+PAGE_QUERY = (
+    'SELECT id, title, technology, created FROM project '
+    'ORDER BY created DESC, id DESC LIMIT 21'
+)
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, timeout=20, isolation_level=None)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def create(path, pragmas):
+    connection = connect(path, pragmas)
+    connection.executescript('''
+        CREATE TABLE project (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            technology TEXT NOT NULL,
+            created REAL NOT NULL
+        );
+        CREATE INDEX project_created_idx ON project (created DESC, id DESC);
+    ''')
+    connection.execute('BEGIN')
+    connection.executemany(
+        'INSERT INTO project (title, technology, created) VALUES (?, ?, ?)',
+        ((f'Project {i}', 'Django', float(i)) for i in range(ROWS)),
+    )
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def reader(path, pragmas, persistent, stop_at, latencies):
+    connection = connect(path, pragmas) if persistent else None
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        if persistent:
+            connection.execute(PAGE_QUERY).fetchall()
+        else:
+            # CONN_MAX_AGE = 0: connect, query, close on every request
+            fresh = connect(path, pragmas)
+            fresh.execute(PAGE_QUERY).fetchall()
+            fresh.close()
+        latencies.append(time.perf_counter() - start)
+    if connection:
+        connection.close()
+
+
+def writer(path, pragmas, stop_at, commits):
+    connection = connect(path, pragmas)
+    created = float(ROWS)
+    while time.monotonic() < stop_at:
+        connection.execute('BEGIN IMMEDIATE')
+        for _ in range(50):
+            created += 1
+            connection.execute(
+                'INSERT INTO project (title, technology, created) VALUES (?, ?, ?)',
+                ('New project', 'Django', created),
+            )
+        connection.execute('COMMIT')
+        commits.append(1)
+    connection.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(pragmas, persistent, readers, duration):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        create(path, pragmas)
+        latencies, commits = [], []
+        stop_at = time.monotonic() + duration
+        threads = [threading.Thread(target=writer, args=(path, pragmas, stop_at, commits))]
+        threads += [
+            threading.Thread(
+                target=reader, args=(path, pragmas, persistent, stop_at, latencies)
+            )
+            for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {
+        'reads_per_second': len(latencies) / duration,
+        'read_p50_ms': 1000 * percentile(latencies, 0.50),
+        'read_p99_ms': 1000 * percentile(latencies, 0.99),
+        'commits_per_second': len(commits) / duration,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+
+    modes = {
+        'stock': ({}, False),
+        'tuned': (SQLITE_PRAGMAS, True),
+    }
+    for name, (pragmas, persistent) in modes.items():
+        result = run(pragmas, persistent, args.readers, args.duration)
+        print(
+            f"{name}: {result['reads_per_second']:.0f} reads/s  "
+            f"p50 {result['read_p50_ms']:.2f} ms  p99 {result['read_p99_ms']:.2f} ms  "
+            f"{result['commits_per_second']:.0f} commits/s"
+        )
+
+
+if __name__ == '__main__':
+    main()
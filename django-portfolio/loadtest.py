@@ -0,0 +1,125 @@
+"""Compare WSGI and ASGI throughput for the portfolio site.
+
+Starts each server in turn, hammers one URL from a pool of client threads
+and reports requests per second and latency percentiles. Needs the
+servers installed (pip install gunicorn uvicorn) and a migrated database:
+
+    python loadtest.py --path /project/ --concurrency 32 --duration 10
+"""
+import argparse
+import http.client
+import shlex
+import socket
+import subprocess
+import threading
+import time
+
+HOST = '127.0.0.1'
+SERVERS = {
+    'wsgi': 'gunicorn portfolio.wsgi --bind {host}:{port} --workers 1 --threads {threads}',
+    'asgi': 'uvicorn portfolio.asgi:application --host {host} --port {port} --workers 1',
+}
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not start listening on port {port}')
+
+
+def client(port, path, stop_at, latencies, errors):
+    connection = http.client.HTTPConnection(HOST, port, timeout=10)
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(repr(error))
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def load(port, path, concurrency, duration):
+    # Warm up caches and connections before measuring
+    client(port, path, time.monotonic() + 1, [], [])
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, path, stop_at, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if not latencies:
+        raise RuntimeError(f'no successful requests ({len(errors)} errors)')
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / duration,
+        'p50_ms': 1000 * percentile(latencies, 0.50),
+        'p99_ms': 1000 * percentile(latencies, 0.99),
+    }
+
+
+def run_server(name, command, args):
+    process = subprocess.Popen(
+        shlex.split(command),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(args.port)
+        return load(args.port, args.path, args.concurrency, args.duration)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/project/')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--server', action='append', choices=sorted(SERVERS))
+    for name in SERVERS:
+        parser.add_argument(f'--{name}-cmd', help=f'override the {name} server command')
+    args = parser.parse_args()
+
+    for name in args.server or sorted(SERVERS, reverse=True):
+        command = getattr(args, f'{name}_cmd') or SERVERS[name]
+        command = command.format(host=HOST, port=args.port, threads=args.concurrency)
+        try:
+            result = run_server(name, command, args)
+        except (OSError, RuntimeError) as error:
+            print(f'{name}: skipped ({error})')
+            continue
+        print(
+            f"{name}: {result['rps']:.0f} req/s  p50 {result['p50_ms']:.1f} ms  "
+            f"p99 {result['p99_ms']:.1f} ms  "
+            f"({result['requests']} requests, {result['errors']} errors)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
 
 application = get_asgi_application()
+
+# Parse templates and build the URL resolver before the first request
+from project.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -43,6 +43,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files, precompressed, before anything else runs
+    'project.middleware.PrecompressedStaticMiddleware',
+    # Request/DB/template timings for a sample of requests, reported in
+    # Server-Timing and at /project/metrics
+    'project.middleware.TimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,16 +56,30 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Fraction of requests TimingMiddleware instruments
+METRICS_SAMPLE_RATE = 0.1
+
 ROOT_URLCONF = 'portfolio.urls'
 
+# Templates come from each app's templates/ directory. Outside DEBUG they
+# are parsed once and kept by the cached loader (and precompiled at
+# startup by project.warmup); under DEBUG edits show up on reload.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [
-            Path(BASE_DIR / 'project/templates'),
-        ],
-        'APP_DIRS': True,
+        # DjangoTemplates that times renders for TimingMiddleware
+        'BACKEND': 'project.template_backend.TimedDjangoTemplates',
+        'NAME': 'django',
+        'DIRS': [],
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -81,7 +100,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Keep connections open between requests instead of reconnecting
+        # (and re-applying SQLITE_PRAGMAS) every time
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            # Seconds a writer waits for the lock before "database is locked"
+            'timeout': 20,
+        },
+    },
+    # Same file, opened query-only; project_list and the export read here
+    'readonly': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+# Applied to every new SQLite connection (see project.db.configure_sqlite).
+# WAL lets readers run alongside a writer; NORMAL sync is safe with WAL.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Negative means KiB: a 64 MiB page cache
+    'cache_size': -65536,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'portfolio',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # Small state every process must agree on, such as the project list
+    # version behind ETags (see project.cache)
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
 }
 
 
@@ -123,6 +192,14 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# collectstatic target; front-end libraries live in project/static/vendor
+# (fetched with `manage.py vendor_static`) instead of a third-party CDN
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Hashed file names for far-future caching, plus .gz/.br copies written
+# at collect time
+STATICFILES_STORAGE = 'project.storage.CompressedManifestStaticFilesStorage'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
 
 application = get_wsgi_application()
+
+# Parse templates and build the URL resolver before the first request
+from project.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from project.models import Category, Project
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+
+
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ['title', 'technology', 'category', 'created']
+    list_filter = ['technology', 'category']
+    list_select_related = ['category']
+    search_fields = ['title']
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'project'
+
+    def ready(self):
+        # Registers the cache invalidation and connection tuning receivers,
+        # and the deploy check for vendored assets
+        from project import checks, signals  # noqa: F401
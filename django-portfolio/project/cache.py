@@ -0,0 +1,79 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Bumped whenever a Project or Category changes. Every cached page, ETag
+# and template fragment includes it, so a bump invalidates them all
+# without having to find and delete individual keys. It lives in the
+# file-based 'shared' cache rather than the per-process default, so a
+# save in any worker, shell or import script is seen by every process.
+VERSION_KEY = 'project:list:version'
+VERSION_CACHE = 'shared'
+PAGE_TIMEOUT = 60 * 10
+
+
+def list_version() :
+    # (version, last-modified timestamp)
+    shared = caches[VERSION_CACHE]
+    state = shared.get(VERSION_KEY)
+    if state is None:
+        state = (1, int(time.time()))
+        shared.add(VERSION_KEY, state, None)
+        state = shared.get(VERSION_KEY, state)
+    return state
+
+
+def bump_list_version() :
+    # Called after COMMIT by the post_save/post_delete receivers.
+    # QuerySet.update(), bulk_create(), bulk_update() and raw SQL send no
+    # signals, so code that writes Projects or Categories that way must
+    # call this itself, through transaction.on_commit() inside atomic().
+    version, _ = list_version()
+    caches[VERSION_CACHE].set(VERSION_KEY, (version + 1, int(time.time())), None)
+
+
+def _path_key(request) :
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def cache_list_page(view) :
+    # Wraps an async view. Like cache_page, but keyed on the list version
+    # so saves invalidate every cached page at once, and with conditional
+    # GET handled up front: ETag and Last-Modified both come from the
+    # shared version, so a 304 never touches the database. The cache
+    # lookups are a local file read and in-process memory, cheap enough
+    # to make from the event loop.
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs) :
+        if request.method not in ('GET', 'HEAD'):
+            return await view(request, *args, **kwargs)
+        version, modified = list_version()
+        path = _path_key(request)
+        # The timestamp keeps validators unique even if the version file is
+        # lost and the counter restarts
+        etag = quote_etag(f'{version}.{modified}-{path}')
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=modified
+        )
+        if not_modified is not None:
+            return not_modified
+        key = f'project:list:page:{version}.{modified}:{path}'
+        cached = cache.get(key)
+        if cached is not None:
+            response = HttpResponse(cached)
+        else:
+            response = await view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(key, response.content, PAGE_TIMEOUT)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        # Browsers keep the page but revalidate it with the ETag each time
+        response['Cache-Control'] = 'max-age=0, must-revalidate'
+        return response
+    return wrapper
@@ -0,0 +1,19 @@
+from django.core.checks import Error, Tags, register
+
+from project.vendor import ASSETS, VENDOR_DIR
+
+
+@register(Tags.staticfiles, deploy=True)
+def check_vendored_assets(app_configs, **kwargs) :
+    # Until the pinned files are vendored, pages fall back to the CDN and
+    # every page load still depends on a third-party host
+    missing = [
+        name for _, name, _ in ASSETS.values() if not (VENDOR_DIR / name).is_file()
+    ]
+    if not missing:
+        return []
+    return [Error(
+        'Front-end assets are not vendored: %s.' % ', '.join(missing),
+        hint="Run 'manage.py vendor_static' and commit project/static/vendor.",
+        id='project.E001',
+    )]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import connections
+
+READ_ONLY_ALIAS = 'readonly'
+
+
+def read_alias() :
+    # Read-heavy views query through the read-only connection when one is
+    # configured, leaving the default connection to writers. Inside a
+    # transaction on default the read stays there, so it sees that
+    # transaction's own uncommitted writes.
+    if READ_ONLY_ALIAS not in settings.DATABASES:
+        return 'default'
+    if connections['default'].in_atomic_block:
+        return 'default'
+    return READ_ONLY_ALIAS
+
+
+def configure_sqlite(connection) :
+    # Pragmas are per connection, so they are applied every time one is
+    # opened; with CONN_MAX_AGE that is once per thread, not per request
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        if connection.alias == READ_ONLY_ALIAS:
+            cursor.execute('PRAGMA query_only = ON')
@@ -0,0 +1,135 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Timings of the sampled request being handled in this context, or None.
+# asgiref copies context into sync_to_async threads, so queries and
+# renders in a view's worker thread still find it.
+current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings :
+    def __init__(self) :
+        self.start = time.perf_counter()
+        self.durations = {}
+        self.queries = 0
+
+    def add(self, name, seconds) :
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name) :
+    # Instrumentation hook: adds the block's duration to the current
+    # request's timings, and costs one lookup when it isn't sampled
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def db_execute_wrapper(execute, sql, params, many, context) :
+    # Installed on every connection (see project.signals); counts and
+    # times queries for sampled requests only
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - start)
+        timings.queries += 1
+
+
+class Histogram :
+    def __init__(self) :
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def observe(self, ms) :
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+
+    def merge(self, other) :
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total_ms += other.total_ms
+
+    def percentile(self, fraction) :
+        # Upper bound of the bucket holding the percentile
+        target = fraction * sum(self.counts)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else None
+        return None
+
+    def export(self) :
+        count = sum(self.counts)
+        return {
+            'count': count,
+            'mean_ms': self.total_ms / count if count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {
+                str(bound): count
+                for bound, count in zip(BUCKETS_MS + ['inf'], self.counts)
+            },
+        }
+
+
+class RollingHistograms :
+    # Per-(route, metric) histograms over the last `slots` windows of
+    # `window` seconds each, so old traffic ages out of the numbers
+    def __init__(self, window=60, slots=5, clock=time.monotonic) :
+        self.window = window
+        self.slots = slots
+        self.clock = clock
+        self.lock = threading.Lock()
+        # [(window index, {(route, metric): Histogram})], oldest first
+        self.windows = []
+
+    def observe(self, route, metric, ms) :
+        index = int(self.clock() // self.window)
+        with self.lock:
+            if not self.windows or self.windows[-1][0] != index:
+                self.windows.append((index, {}))
+                del self.windows[:-self.slots]
+            histograms = self.windows[-1][1]
+            histogram = histograms.get((route, metric))
+            if histogram is None:
+                histogram = histograms[route, metric] = Histogram()
+            histogram.observe(ms)
+
+    def export(self) :
+        oldest = int(self.clock() // self.window) - self.slots + 1
+        merged = {}
+        with self.lock:
+            for index, histograms in self.windows:
+                if index < oldest:
+                    continue
+                for (route, metric), histogram in histograms.items():
+                    merged.setdefault(route, {}).setdefault(metric, Histogram()).merge(histogram)
+        return {
+            route: {metric: histogram.export() for metric, histogram in metrics.items()}
+            for route, metrics in merged.items()
+        }
+
+    def clear(self) :
+        with self.lock:
+            self.windows = []
+
+
+histograms = RollingHistograms()
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+
+from django.conf import settings
+from django.http import FileResponse
+from django.urls import Resolver404, resolve
+
+from project import metrics
+
+logger = logging.getLogger(__name__)
+
+# Best first: the first encoding the client accepts and we have wins
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Unhashed names can change in place, so they must be revalidated
+REVALIDATE = 'public, max-age=60, must-revalidate'
+
+
+class PrecompressedStaticMiddleware :
+    # Serves collected files from STATIC_ROOT in-process. Files with a
+    # .br/.gz sibling (see project.storage) are sent in the best encoding
+    # the request's Accept-Encoding allows, and hashed names from the
+    # manifest are marked immutable. Anything else falls through.
+    # Native sync/async middleware: unlike a MiddlewareMixin subclass it
+    # doesn't push each ASGI request through sync_to_async; the work per
+    # request is a dict lookup and opening one local file.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) :
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Lets Django's handler await this middleware directly
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        self.files = None
+        self.warned = False
+
+    def __call__(self, request) :
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request) :
+        response = self.serve(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def load(self) :
+        # {url path: (file path, {encoding: file path}, immutable)}, or
+        # None while there is nothing collected to scan
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            return None
+        files = {}
+        hashed = set()
+        manifest = os.path.join(root, 'staticfiles.json')
+        if os.path.exists(manifest):
+            with open(manifest) as manifest_file:
+                hashed = set(json.load(manifest_file)['paths'].values())
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                variants = {
+                    encoding: path + suffix
+                    for encoding, suffix in ENCODINGS
+                    if os.path.exists(path + suffix)
+                }
+                files[settings.STATIC_URL + relative] = (
+                    path, variants, relative in hashed
+                )
+        return files
+
+    def serve(self, request) :
+        if not request.path.startswith(settings.STATIC_URL):
+            return None
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if self.files is None:
+            # Built once per process, but only from a collected tree: until
+            # collectstatic has run every static request rescans
+            self.files = self.load()
+            if self.files is None:
+                if not self.warned:
+                    logger.warning(
+                        'STATIC_ROOT %r does not exist; run collectstatic',
+                        settings.STATIC_ROOT,
+                    )
+                    self.warned = True
+                return None
+        entry = self.files.get(request.path)
+        if entry is None:
+            return None
+        path, variants, immutable = entry
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        accepted = {token.split(';')[0].strip() for token in accepted.split(',')}
+        encoding = next((e for e, _ in ENCODINGS if e in accepted and e in variants), None)
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        response = FileResponse(
+            open(variants[encoding] if encoding else path, 'rb'),
+            content_type=content_type,
+            filename=os.path.basename(path),
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = IMMUTABLE if immutable else REVALIDATE
+        return response
+
+
+class TimingMiddleware :
+    # Times a sample of requests (METRICS_SAMPLE_RATE) end to end: URL
+    # resolution, DB time and query count, template rendering (see
+    # project.template_backend) and the total. Sampled responses carry
+    # them in a Server-Timing header and feed the per-route histograms
+    # behind the metrics view. Unsampled requests pay one random() call.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) :
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Lets Django's handler await this middleware directly
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request) :
+        if self.is_async:
+            return self.__acall__(request)
+        timings = self.sample()
+        if timings is None:
+            return self.get_response(request)
+        self.time_resolve(request, timings)
+        token = metrics.current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request) :
+        timings = self.sample()
+        if timings is None:
+            return await self.get_response(request)
+        self.time_resolve(request, timings)
+        token = metrics.current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, timings)
+
+    def sample(self) :
+        rate = getattr(settings, 'METRICS_SAMPLE_RATE', 0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        return metrics.RequestTimings()
+
+    def time_resolve(self, request, timings) :
+        # The handler resolves the path after the middleware chain, where
+        # nothing can time it; on sampled requests resolve it once more
+        # here the same way (the resolver is cached, only the match runs)
+        start = time.perf_counter()
+        try:
+            resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            pass
+        timings.add('resolve', time.perf_counter() - start)
+
+    def finish(self, request, response, timings) :
+        timings.add('total', time.perf_counter() - timings.start)
+        match = request.resolver_match
+        route = match.route if match else 'unresolved'
+        entries = []
+        for name, seconds in timings.durations.items():
+            ms = 1000 * seconds
+            metrics.histograms.observe(route, name, ms)
+            if name == 'db':
+                entries.append(f'db;dur={ms:.2f};desc="{timings.queries} queries"')
+            else:
+                entries.append(f'{name};dur={ms:.2f}')
+        response['Server-Timing'] = ', '.join(entries)
+        return response
@@ -1,3 +1,44 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Category(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'categories'
+
+    def __str__(self):
+        return self.name
+
+
+class Project(models.Model):
+    title = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    technology = models.CharField(max_length=50)
+    # project_cat_created_idx leads with category, so the FK's own
+    # single-column index would only cost a write per insert
+    category = models.ForeignKey(
+        Category, on_delete=models.PROTECT, related_name='projects', db_index=False
+    )
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # (created, id) is the keyset project_list pages on; each index
+        # below matches one of its filters followed by that ordering
+        ordering = ['-created', '-id']
+        indexes = [
+            models.Index(fields=['-created', '-id'], name='project_created_idx'),
+            models.Index(
+                fields=['technology', '-created', '-id'],
+                name='project_tech_created_idx',
+            ),
+            models.Index(
+                fields=['category', '-created', '-id'],
+                name='project_cat_created_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
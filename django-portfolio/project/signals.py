@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from project.cache import bump_list_version
+from project.db import configure_sqlite
+from project.metrics import db_execute_wrapper
+from project.models import Category, Project
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_project_list(sender, using, **kwargs):
+    # After COMMIT: a bump inside the writer's transaction would let a
+    # request still reading the old snapshot cache it under the new version
+    transaction.on_commit(bump_list_version, using=using)
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    configure_sqlite(connection)
+    # The wrapper list outlives reconnects of the same connection object
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
@@ -0,0 +1,42 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.html')
+# Below this, the encoded copy and its headers aren't worth the lookup
+MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage) :
+    # collectstatic writes hashed copies as usual, then a .gz (and a .br
+    # when the brotli package is installed) next to each hashed text file,
+    # so the static handler can serve them without compressing per request
+    def post_process(self, paths, dry_run=False, **options) :
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name) :
+        path = self.path(name)
+        with open(path, 'rb') as static_file:
+            content = static_file.read()
+        if len(content) < MIN_SIZE:
+            return
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as compressed_file:
+                    compressed_file.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
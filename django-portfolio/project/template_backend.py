@@ -0,0 +1,25 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends import django
+
+from project.metrics import timed
+
+
+class Template(django.Template) :
+    def render(self, context=None, request=None) :
+        with timed('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(django.DjangoTemplates) :
+    # The stock backend, with every top-level render (render(),
+    # render_to_string(), TemplateResponse, error pages) added to the
+    # sampled request's 'template' timing. Includes and extends render
+    # inside their parent, so they aren't counted twice.
+    def from_string(self, template_code) :
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name) :
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django.reraise(exc, self)
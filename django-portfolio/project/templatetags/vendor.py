@@ -0,0 +1,15 @@
+from django import template
+
+from project.vendor import asset_integrity, asset_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_url(name) :
+    return asset_url(name)
+
+
+@register.simple_tag
+def vendor_integrity(name) :
+    return asset_integrity(name)
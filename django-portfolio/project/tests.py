@@ -1,3 +1,546 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.template import engines
+from django.db import DatabaseError, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+from django.utils import timezone
+
+from project.cache import VERSION_KEY, list_version
+from project.checks import check_vendored_assets
+from project import metrics
+from project.metrics import histograms
+from project.warmup import warm_up
+from project.models import Category, Project
+from project.vendor import ASSETS
+from project.views import PAGE_SIZE, encode_cursor, fetch_page, page_queryset
+
+SEEDED_PROJECTS = 20000
+TECHNOLOGIES = ['Django', 'Pygame', 'Flask', 'React']
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix='portfolio-test-cache-')
+# The shared list-version cache goes to a temporary directory
+page_settings = override_settings(
+    CACHES={
+        **settings.CACHES,
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': SHARED_CACHE_DIR,
+        },
+    },
+)
+
+
+def clear_caches():
+    cache.clear()
+    caches['shared'].clear()
+
+
+def seed_projects(count):
+    Category.objects.bulk_create(
+        Category(name=f'Category {i}') for i in range(10)
+    )
+    categories = list(Category.objects.all())
+    start = timezone.now()
+    Project.objects.bulk_create(
+        (
+            Project(
+                title=f'Project {i}',
+                technology=TECHNOLOGIES[i % len(TECHNOLOGIES)],
+                category=categories[i % len(categories)],
+                # Pairs share a timestamp so the id tie-break is exercised
+                created=start - timedelta(minutes=i // 2),
+            )
+            for i in range(count)
+        ),
+        batch_size=2000,
+    )
+
+
+@page_settings
+class ProjectListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_projects(SEEDED_PROJECTS)
+
+    def setUp(self):
+        clear_caches()
+
+    def deep_project(self, from_end):
+        return Project.objects.order_by('-created', '-id')[SEEDED_PROJECTS - from_end]
+
+    def walk(self, pages, **params):
+        seen = []
+        response = None
+        for _ in range(pages):
+            response = self.client.get('/project/', params)
+            seen.extend(response.context['projects'])
+            if not response.context['next_cursor']:
+                break
+            params['after'] = response.context['next_cursor']
+        return seen, response
+
+    def test_pages_follow_ordering_without_gaps(self):
+        seen, _ = self.walk(5)
+        expected = list(Project.objects.order_by('-created', '-id')[:5 * PAGE_SIZE])
+        self.assertEqual([p.pk for p in seen], [p.pk for p in expected])
+
+    def test_filters_apply_across_pages(self):
+        seen, _ = self.walk(3, technology='Pygame')
+        self.assertEqual(len(seen), 3 * PAGE_SIZE)
+        self.assertTrue(all(p.technology == 'Pygame' for p in seen))
+
+    def test_last_page_has_no_next_cursor(self):
+        cursor = encode_cursor(self.deep_project(5))
+        response = self.client.get('/project/', {'after': cursor})
+        self.assertEqual(len(response.context['projects']), 4)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/project/', {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/project/')
+            # Touch the related field the template shows
+            [p.category.name for p in response.context['projects']]
+        deep = self.deep_project(100)
+        with self.assertNumQueries(1):
+            self.client.get('/project/', {'after': encode_cursor(deep)})
+
+    def test_deep_page_latency_matches_first_page(self):
+        deep = {'after': encode_cursor(self.deep_project(100))}
+
+        def timed(params):
+            start = time.perf_counter()
+            fetch_page(params)
+            return time.perf_counter() - start
+
+        # The query itself: repeat requests would be served by the page cache
+        first = min(timed({}) for _ in range(10))
+        last = min(timed(deep) for _ in range(10))
+        self.assertLess(first, 0.05)
+        # OFFSET would make the deep page scan ~20k rows; keyset stays flat
+        self.assertLess(last, first * 2)
+
+    def test_cursor_pages_seek_into_the_index(self):
+        cursor = encode_cursor(self.deep_project(100))
+        for params in ({}, {'technology': 'Pygame'}, {'category': '1'}):
+            plan = page_queryset({**params, 'after': cursor}).explain()
+            self.assertIn('SEARCH', plan)
+            self.assertNotIn('SCAN', plan)
+
+    def test_category_has_only_the_composite_index(self):
+        with connections['default'].cursor() as cursor:
+            constraints = connections['default'].introspection.get_constraints(
+                cursor, Project._meta.db_table
+            )
+        category_indexes = [
+            constraint['columns'] for constraint in constraints.values()
+            if constraint['index'] and constraint['columns'][0] == 'category_id'
+        ]
+        self.assertEqual(category_indexes, [['category_id', 'created', 'id']])
+
+    def test_invalid_category_is_not_found(self):
+        response = self.client.get('/project/', {'category': 'abc'})
+        self.assertEqual(response.status_code, 404)
+
+
+@page_settings
+class ProjectListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_projects(100)
+
+    def setUp(self):
+        clear_caches()
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get('/project/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/project/')
+        self.assertEqual(first.content, second.content)
+
+    def test_conditional_get_returns_not_modified(self):
+        response = self.client.get('/project/')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(
+                '/project/', HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(revalidated.status_code, 304)
+        revalidated = self.client.get(
+            '/project/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_pages_have_distinct_etags(self):
+        first = self.client.get('/project/')
+        filtered = self.client.get('/project/', {'technology': 'Pygame'})
+        self.assertNotEqual(first['ETag'], filtered['ETag'])
+
+    def test_saving_a_project_invalidates_pages_and_fragments(self):
+        response = self.client.get('/project/')
+        project = Project.objects.order_by('-created', '-id').first()
+        project.title = 'Renamed project'
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        revalidated = self.client.get(
+            '/project/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, 'Renamed project')
+
+    def test_version_is_shared_between_processes(self):
+        response = self.client.get('/project/')
+        # What another worker sees: a separate cache object on the same files
+        other = FileBasedCache(SHARED_CACHE_DIR, {})
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.order_by('-created', '-id').first().save()
+        self.assertEqual(other.get(VERSION_KEY), list_version())
+        # A bump made elsewhere invalidates this process's ETags too
+        version, _ = other.get(VERSION_KEY)
+        other.set(VERSION_KEY, (version + 1, int(time.time())), None)
+        revalidated = self.client.get(
+            '/project/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(revalidated.status_code, 200)
+
+    def test_saving_a_category_invalidates_pages(self):
+        self.client.get('/project/')
+        project = Project.objects.order_by('-created', '-id').first()
+        project.category.name = 'Renamed category'
+        with self.captureOnCommitCallbacks(execute=True):
+            project.category.save()
+        self.assertContains(self.client.get('/project/'), 'Renamed category')
+
+
+@page_settings
+class AsyncServingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_projects(2 * PAGE_SIZE)
+
+    def setUp(self):
+        clear_caches()
+
+    async def test_list_under_async_client(self):
+        response = await self.async_client.get('/project/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['projects']), PAGE_SIZE)
+
+    def test_export_streams_every_project(self):
+        response = self.client.get('/project/export.csv')
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ['id', 'title', 'technology', 'category', 'created'])
+        self.assertEqual(len(rows), 2 * PAGE_SIZE + 1)
+
+    async def test_export_under_asgi_handler(self):
+        # The sync client never reaches ASGIHandler.send_response, which is
+        # where a streamed queryset would hit the event loop
+        communicator = ApplicationCommunicator(get_asgi_application(), {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/project/export.csv',
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(5)
+        self.assertEqual(start['status'], 200)
+        body = b''
+        while True:
+            message = await communicator.receive_output(5)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), 2 * PAGE_SIZE + 1)
+
+    def test_middleware_stack_is_async_capable(self):
+        # A sync-only middleware would force the whole stack into sync mode
+        for path in settings.MIDDLEWARE:
+            middleware = import_string(path)
+            self.assertTrue(getattr(middleware, 'async_capable', False), path)
+
+    def test_project_middleware_is_native_async(self):
+        # Django 3.2 runs a MiddlewareMixin's process_request/response
+        # through sync_to_async on every ASGI request. The stock middleware
+        # still does; ours must not add more thread hops.
+        for path in settings.MIDDLEWARE:
+            if path.startswith('project.'):
+                middleware = import_string(path)
+                self.assertFalse(issubclass(middleware, MiddlewareMixin), path)
+                instance = middleware(self.async_get_response)
+                self.assertTrue(asyncio.iscoroutinefunction(instance), path)
+
+    async def async_get_response(self, request):
+        return HttpResponse()
+
+
+@page_settings
+class ListVersionCommitTests(TransactionTestCase):
+    databases = {'default', 'readonly'}
+
+    def setUp(self):
+        clear_caches()
+        seed_projects(PAGE_SIZE)
+
+    def test_version_is_bumped_on_commit(self):
+        self.client.get('/project/')
+        before = list_version()
+        project = Project.objects.order_by('-created', '-id').first()
+        with transaction.atomic():
+            project.title = 'New title'
+            project.save()
+            # Requests on other connections still read the old row until
+            # COMMIT, so what they cache must stay under the old version
+            self.assertEqual(list_version(), before)
+        self.assertEqual(list_version()[0], before[0] + 1)
+        self.assertContains(self.client.get('/project/'), 'New title')
+
+    def test_rolled_back_saves_keep_the_version(self):
+        before = list_version()
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                Project.objects.order_by('-created', '-id').first().save()
+                raise DatabaseError
+        self.assertEqual(list_version(), before)
+
+
+@page_settings
+class ReadOnlyAliasTests(TransactionTestCase):
+    # Outside TestCase's wrapping transaction, so reads really go through
+    # the read-only alias (a mirror of default under test)
+    databases = {'default', 'readonly'}
+
+    def setUp(self):
+        clear_caches()
+        seed_projects(PAGE_SIZE)
+
+    def test_list_reads_through_readonly_alias(self):
+        with self.assertNumQueries(1, using='readonly'):
+            with self.assertNumQueries(0, using='default'):
+                response = self.client.get('/project/')
+        self.assertEqual(len(response.context['projects']), PAGE_SIZE)
+
+    def test_readonly_alias_rejects_writes(self):
+        with self.assertRaises(DatabaseError):
+            Category.objects.using('readonly').create(name='Not allowed')
+
+    def test_pragmas_applied_to_new_connections(self):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.source.cleanup)
+        self.addCleanup(self.root.cleanup)
+        Path(self.source.name, 'site.css').write_text('body { margin: 0; }\n' * 100)
+        Path(self.source.name, 'tiny.js').write_text('x = 1;\n')
+        settings_override = override_settings(
+            STATICFILES_DIRS=[self.source.name],
+            STATIC_ROOT=self.root.name,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        manifest = json.loads(Path(self.root.name, 'staticfiles.json').read_text())
+        self.hashed = manifest['paths']['site.css']
+
+    def test_collectstatic_writes_gzip_variants(self):
+        hashed = Path(self.root.name, self.hashed)
+        compressed = Path(f'{hashed}.gz').read_bytes()
+        self.assertEqual(gzip.decompress(compressed), hashed.read_bytes())
+        # Not worth compressing
+        tiny = json.loads(Path(self.root.name, 'staticfiles.json').read_text())
+        self.assertFalse(Path(self.root.name, tiny['paths']['tiny.js'] + '.gz').exists())
+
+    def test_serves_gzip_when_accepted(self):
+        response = self.client.get(
+            f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body, Path(self.root.name, self.hashed).read_bytes())
+
+    def test_serves_identity_without_accept_encoding(self):
+        response = self.client.get(f'/static/{self.hashed}')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(body, Path(self.root.name, self.hashed).read_bytes())
+
+    def test_unhashed_names_are_revalidated(self):
+        response = self.client.get('/static/site.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_static_root_is_rescanned(self):
+        root = Path(self.root.name, 'later')
+        with override_settings(STATIC_ROOT=str(root)):
+            with self.assertLogs('project.middleware', 'WARNING'):
+                response = self.client.get(f'/static/{self.hashed}')
+            self.assertEqual(response.status_code, 404)
+            call_command('collectstatic', interactive=False, verbosity=0)
+            response = self.client.get(f'/static/{self.hashed}')
+            self.assertEqual(response.status_code, 200)
+
+
+@page_settings
+class VendoredAssetTests(TestCase):
+    # Pages render through the real manifest storage, which can only build
+    # URLs for files collectstatic has hashed
+    def setUp(self):
+        clear_caches()
+        self.source = tempfile.TemporaryDirectory()
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.source.cleanup)
+        self.addCleanup(self.root.cleanup)
+        settings_override = override_settings(
+            STATICFILES_DIRS=[self.source.name],
+            STATIC_ROOT=self.root.name,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_falls_back_to_pinned_cdn(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        response = self.client.get('/project/')
+        self.assertEqual(response.status_code, 200)
+        for url, _, sri in ASSETS.values():
+            self.assertContains(response, f'="{url}"')
+            self.assertContains(response, f'integrity="{sri}"')
+
+    def test_deploy_check_reports_missing_vendor_files(self):
+        with mock.patch('project.checks.VENDOR_DIR', Path(self.source.name)):
+            errors = check_vendored_assets(None)
+            self.assertEqual([error.id for error in errors], ['project.E001'])
+            for _, relative, _ in ASSETS.values():
+                vendored = Path(self.source.name, relative)
+                vendored.parent.mkdir(parents=True, exist_ok=True)
+                vendored.write_text('')
+            self.assertEqual(check_vendored_assets(None), [])
+
+    def test_uses_collected_vendor_files(self):
+        _, relative, sri = ASSETS['bootstrap.css']
+        vendored = Path(self.source.name, 'vendor', relative)
+        vendored.parent.mkdir(parents=True)
+        vendored.write_text('body { margin: 0; }\n')
+        call_command('collectstatic', interactive=False, verbosity=0)
+        manifest = json.loads(Path(self.root.name, 'staticfiles.json').read_text())
+        response = self.client.get('/project/')
+        self.assertEqual(response.status_code, 200)
+        hashed = manifest['paths'][f'vendor/{relative}']
+        self.assertContains(response, f'href="/static/{hashed}"')
+        self.assertContains(response, f'integrity="{sri}"')
+        # Not vendored, so still from the CDN
+        self.assertContains(response, ASSETS['popper.js'][0])
+
+
+@page_settings
+@override_settings(METRICS_SAMPLE_RATE=1)
+class TimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_projects(PAGE_SIZE)
+
+    def setUp(self):
+        clear_caches()
+        histograms.clear()
+
+    def server_timing(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    def test_server_timing_breaks_down_the_request(self):
+        timing = self.server_timing(self.client.get('/project/'))
+        self.assertEqual(set(timing), {'resolve', 'db', 'template', 'total'})
+        self.assertEqual(timing['db']['desc'], '"1 queries"')
+        self.assertLessEqual(
+            float(timing['template']['dur']), float(timing['total']['dur'])
+        )
+
+    def test_any_template_render_is_timed(self):
+        timings = metrics.RequestTimings()
+        token = metrics.current.set(timings)
+        try:
+            engines['django'].from_string('{{ value }}').render({'value': 1})
+        finally:
+            metrics.current.reset(token)
+        self.assertIn('template', timings.durations)
+
+    async def test_timings_follow_async_view_threads(self):
+        response = await self.async_client.get('/project/')
+        self.assertIn('template', self.server_timing(response))
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get('/project/')
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(histograms.export(), {})
+
+    def test_metrics_endpoint_reports_route_histograms(self):
+        for _ in range(3):
+            self.client.get('/project/')
+        report = self.client.get('/project/metrics').json()
+        self.assertEqual(report['project/']['total']['count'], 3)
+        # Only the first request missed the page cache
+        self.assertEqual(report['project/']['db']['count'], 1)
+
+    def test_metrics_endpoint_is_local_only(self):
+        response = self.client.get('/project/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            ['django.template.loaders.app_directories.Loader'],
+        )],
+    },
+}])
+class TemplateWarmUpTests(TestCase):
+    def test_warm_up_parses_every_project_template(self):
+        names = warm_up()
+        self.assertIn('project/index.html', names)
+        loader = engines['django'].engine.template_loaders[0]
+        for name in names:
+            self.assertIn(name, loader.get_template_cache)
+
+    def test_warmed_templates_are_not_parsed_again(self):
+        warm_up()
+        loader = engines['django'].engine.template_loaders[0]
+        template = loader.get_template_cache['project/index.html']
+        self.assertIs(engines['django'].get_template('project/index.html').template, template)
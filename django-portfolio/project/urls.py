@@ -18,4 +18,6 @@ from project import views
 
 urlpatterns = [
     path('', views.project_list),
+    path('export.csv', views.project_export),
+    path('metrics', views.metrics_view),
 ]
@@ -0,0 +1,54 @@
+import base64
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.templatetags.static import static
+
+VENDOR_DIR = Path(__file__).resolve().parent / 'static' / 'vendor'
+# name: (pinned CDN url, path under static/vendor, subresource integrity
+# hash). A vendored file is byte-for-byte the CDN one, so the hash covers
+# whichever of the two the page ends up loading.
+ASSETS = {
+    'bootstrap.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/css/bootstrap.min.css',
+        'bootstrap/css/bootstrap.min.css',
+        'sha384-eOJMYsd53ii+scO/bJGFsiCZc+5NDVN2yr8+0RDqr0Ql0h+rP48ckxlpbzKgwra6',
+    ),
+    'popper.js': (
+        'https://cdn.jsdelivr.net/npm/@popperjs/core@2.9.1/dist/umd/popper.min.js',
+        'popper/popper.min.js',
+        'sha384-SR1sx49pcuLnqZUnnPwx6FCym0wLsk5JZuNx2bPPENzswTNFaQU1RDvt3wT4gWFG',
+    ),
+    'bootstrap.js': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/js/bootstrap.min.js',
+        'bootstrap/js/bootstrap.min.js',
+        'sha384-j0CNLUeiqtyaRmlzUHCPZ+Gy5fQu0dQ6eZ/xAww941Ai1SxSY+0EQqNXNE6DZiVc',
+    ),
+}
+
+
+def integrity(content) :
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+def is_vendored(path) :
+    # Outside DEBUG the manifest storage only has URLs for what
+    # collectstatic hashed, and asking it for anything else is a 500
+    if not settings.DEBUG and isinstance(staticfiles_storage, ManifestFilesMixin):
+        return path in staticfiles_storage.hashed_files
+    return finders.find(path) is not None
+
+
+def asset_url(name) :
+    # The local copy once `manage.py vendor_static` has fetched it (and
+    # collectstatic has picked it up), else the pinned CDN file
+    url, relative, _ = ASSETS[name]
+    path = f'vendor/{relative}'
+    return static(path) if is_vendored(path) else url
+
+
+def asset_integrity(name) :
+    return ASSETS[name][2]
@@ -1,6 +1,144 @@
-from django.shortcuts import render
-from django.http import HttpResponse
+import base64
+import binascii
+import csv
 
-# Create your views here.
-def project_list(request) :
-    return render(request, 'project/index.html')
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+
+from project.cache import cache_list_page, list_version
+from project.db import read_alias
+from project.metrics import histograms
+from project.models import Project
+
+PAGE_SIZE = 20
+# Only what the list template shows, so each page is one narrow query
+LIST_FIELDS = ['title', 'technology', 'created', 'category__name']
+EXPORT_FIELDS = ['id', 'title', 'technology', 'category', 'created']
+EXPORT_CHUNK_SIZE = 2000
+
+
+def encode_cursor(project) :
+    value = f'{project.created.isoformat()}|{project.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor) :
+    try:
+        created, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise Http404('Invalid cursor')
+    if created is None:
+        raise Http404('Invalid cursor')
+    return created, pk
+
+
+def page_queryset(params) :
+    # Keyset pagination: each page continues from the (created, id) of the
+    # last row on the previous one, so deep pages cost the same as the
+    # first instead of scanning past an OFFSET
+    projects = (
+        Project.objects.using(read_alias())
+        .select_related('category')
+        .only(*LIST_FIELDS)
+    )
+    technology = params.get('technology')
+    if technology:
+        projects = projects.filter(technology=technology)
+    category = params.get('category')
+    if category:
+        try:
+            category_id = int(category)
+        except ValueError:
+            raise Http404('Invalid category')
+        projects = projects.filter(category_id=category_id)
+    cursor = params.get('after')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        # The plain range bound lets SQLite seek into the (created, id)
+        # index; the OR alone makes it scan the index from the start
+        projects = projects.filter(created__lte=created).filter(
+            Q(created__lt=created) | Q(created=created, pk__lt=pk)
+        )
+    # One extra row tells us whether there is a next page
+    return projects.order_by('-created', '-pk')[:PAGE_SIZE + 1]
+
+
+def fetch_page(params) :
+    technology = params.get('technology')
+    category = params.get('category')
+    page = list(page_queryset(params))
+    next_cursor = encode_cursor(page[PAGE_SIZE - 1]) if len(page) > PAGE_SIZE else None
+    return {
+        'projects': page[:PAGE_SIZE],
+        'next_cursor': next_cursor,
+        'technology': technology or '',
+        'category': category or '',
+        # Part of every row's fragment cache key
+        'cache_version': '%d.%d' % list_version(),
+    }
+
+
+@cache_list_page
+async def project_list(request) :
+    # Django 3.2's ORM and template engine are sync only. The query runs
+    # on the shared sync thread, where Django keeps the request's database
+    # connection. The render touches no database (categories come from
+    # select_related, rows from the fragment cache), so it runs in the
+    # loop's bounded executor instead of queueing behind other requests'
+    # queries and renders.
+    context = await sync_to_async(fetch_page)(request.GET)
+    render = sync_to_async(render_page, thread_sensitive=False)
+    content = await render(context, request)
+    return HttpResponse(content)
+
+
+def render_page(context, request) :
+    return render_to_string('project/index.html', context, request)
+
+
+def export_rows() :
+    yield EXPORT_FIELDS
+    projects = (
+        Project.objects.using(read_alias())
+        .order_by('-created', '-pk')
+        .values_list('pk', 'title', 'technology', 'category__name', 'created')
+    )
+    # iterator() streams from the cursor in chunks instead of loading
+    # the whole catalogue into memory first
+    for row in projects.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield row
+
+
+def project_export(request) :
+    writer = csv.writer(Echo())
+    lines = (writer.writerow(row) for row in export_rows())
+    if isinstance(request, ASGIRequest):
+        # Django 3.2's ASGI handler iterates a streaming response on the
+        # event loop, where the ORM refuses to run. Build the file here,
+        # in the sync view's thread, and send it whole instead.
+        response = HttpResponse(''.join(lines), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="projects.csv"'
+    return response
+
+
+class Echo :
+    # File-like object for csv.writer that hands each line straight back
+    def write(self, value) :
+        return value
+
+
+def metrics_view(request) :
+    # Rolling per-route latency histograms from TimingMiddleware; local
+    # clients only
+    if request.META.get('REMOTE_ADDR') not in ('127.0.0.1', '::1'):
+        return HttpResponseForbidden()
+    return JsonResponse(histograms.export())
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from django.template import engines
+from django.urls import get_resolver
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+
+
+def app_templates() :
+    return sorted(
+        path.relative_to(TEMPLATE_DIR).as_posix()
+        for path in TEMPLATE_DIR.rglob('*.html')
+    )
+
+
+def warm_up() :
+    # Called once at server start (wsgi.py/asgi.py). With the cached
+    # loader every project template is parsed here instead of on the
+    # first request that needs it; the URL resolver is built the same way.
+    engine = engines['django']
+    names = app_templates()
+    for name in names:
+        engine.get_template(name)
+    get_resolver().url_patterns
+    return names
@@ -0,0 +1,96 @@
+"""Benchmark project template rendering with and without the cached loader.
+
+Renders project/index.html with a page of projects three ways: parsing on
+every render (what DEBUG does), the cached loader's first render, and its
+steady state after project.warmup has run:
+
+    python renderbench.py --renders 500
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
+
+import django
+from django.conf import settings
+
+TEMPLATE = 'project/index.html'
+APP_LOADERS = ['django.template.loaders.app_directories.Loader']
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', APP_LOADERS)]
+
+
+def page_context():
+    category = SimpleNamespace(name='Games')
+    projects = [
+        SimpleNamespace(
+            pk=i,
+            title=f'Project {i}',
+            technology='Pygame',
+            category=category,
+            created=datetime(2021, 5, 1, tzinfo=timezone.utc),
+        )
+        for i in range(20)
+    ]
+    return {
+        'projects': projects,
+        'next_cursor': 'MjAyMS0wNS0wMXwx',
+        'technology': '',
+        'category': '',
+        'cache_version': 1,
+    }
+
+
+def make_engine(loaders):
+    from django.template import Engine
+    from django.template.backends.django import get_installed_libraries
+    return Engine(loaders=loaders, libraries=get_installed_libraries(), debug=False)
+
+
+def render(engine, context):
+    from django.template import Context
+    return engine.get_template(TEMPLATE).render(Context(context))
+
+
+def time_renders(engine, context, renders):
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(engine, context)
+    return 1000 * (time.perf_counter() - start) / renders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--renders', type=int, default=500)
+    args = parser.parse_args()
+
+    # Fragment caching would hide the rendering being measured
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    django.setup()
+    context = page_context()
+
+    parsing = time_renders(make_engine(APP_LOADERS), context, args.renders)
+
+    cold = make_engine(CACHED_LOADERS)
+    start = time.perf_counter()
+    render(cold, context)
+    first = 1000 * (time.perf_counter() - start)
+
+    warm = make_engine(CACHED_LOADERS)
+    # What project.warmup.warm_up() does at server start
+    warm.get_template(TEMPLATE)
+    start = time.perf_counter()
+    render(warm, context)
+    first_warmed = 1000 * (time.perf_counter() - start)
+    steady = time_renders(warm, context, args.renders)
+
+    print(f'parse every render     {parsing:.3f} ms/render')
+    print(f'cached, first render   {first:.3f} ms')
+    print(f'cached, warmed first   {first_warmed:.3f} ms')
+    print(f'cached, steady state   {steady:.3f} ms/render')
+
+
+if __name__ == '__main__':
+    main()